@@ -0,0 +1,79 @@
+import argparse
+import sys
+from typing import Optional, List, NamedTuple
+
+from src.config.configurator import ExchangeConvertorConfiguration
+from src.controllers.const import CONVERSION_CURRENCIES
+from src.convertor.convertor import ConversionSnapshot, ExchangeConvertor
+from src.utils.lazy_import import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+
+class CSVConversion(NamedTuple):
+    """
+    результат конвертации CSV файла: количество строк и номера строк данных (с 0) с неизвестной валютой
+    """
+    rows: int
+    invalid_rows: List[int]
+
+
+def convert_csv(input_path: str, output_path: str, snapshot: ConversionSnapshot, amount_column: str = 'amount',
+                currency_column: Optional[str] = None, currency: str = 'RUB', output_column: str = 'converted',
+                chunksize: int = 100_000) -> CSVConversion:
+    """
+    функция пакетной конвертации сумм CSV файла. файл читается и записывается частями по chunksize строк,
+    поэтому расход памяти не зависит от размера файла
+    :param input_path: -> str путь к исходному файлу
+    :param output_path: -> str путь к файлу результата
+    :param snapshot: -> ConversionSnapshot снимок курсов, общий для всего файла
+    :param amount_column: -> str колонка сумм
+    :param currency_column: -> str колонка валюты сумм (RUB или THB), None - валюта currency для всех строк.
+                                   для строк с другой валютой результат не рассчитывается (NaN)
+    :param currency: -> str валюта сумм при отсутствии колонки валюты
+    :param output_column: -> str колонка результата
+    :param chunksize: -> int количество строк в части файла
+    :return: -> CSVConversion количество обработанных строк и строки с неизвестной валютой
+    """
+    rows, invalid_rows = 0, []
+    for position, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+        amounts = chunk[amount_column].to_numpy()
+        if currency_column:
+            currencies = snapshot.normalize_currency(chunk[currency_column].astype(str).to_numpy())
+            valid = np.isin(currencies, CONVERSION_CURRENCIES)
+            converted = np.full(len(chunk), np.nan)
+            converted[valid] = snapshot.convert(amounts[valid], currencies[valid])
+            invalid_rows.extend((rows + np.flatnonzero(~valid)).tolist())
+        else:
+            converted = snapshot.convert(amounts, currency)
+        chunk[output_column] = converted
+        chunk.to_csv(output_path, mode='w' if position == 0 else 'a', header=position == 0, index=False)
+        rows += len(chunk)
+    return CSVConversion(rows, invalid_rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Convert RUB amounts to THB and THB amounts to RUB in a CSV file')
+    parser.add_argument('input', help='source CSV file')
+    parser.add_argument('output', help='result CSV file')
+    parser.add_argument('--amount-column', default='amount', help='column with amounts')
+    parser.add_argument('--currency-column', default=None, help='column with amount currency, RUB or THB')
+    parser.add_argument('--currency', default='RUB', choices=('RUB', 'THB'), help='currency of all amounts')
+    parser.add_argument('--output-column', default='converted', help='column with converted amounts')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows per chunk')
+    args = parser.parse_args()
+
+    snapshot = ExchangeConvertor(ExchangeConvertorConfiguration()).conversion_snapshot()
+    result = convert_csv(args.input, args.output, snapshot, args.amount_column, args.currency_column, args.currency,
+                         args.output_column, args.chunksize)
+    print(f'{result.rows} rows converted, USD/RUB: {snapshot.usd_rub}, USD/THB: {snapshot.usd_thb}')
+    if result.invalid_rows:
+        print(f'{len(result.invalid_rows)} rows with unknown currency are left empty: '
+              f'{", ".join(map(str, result.invalid_rows[:20]))}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+from src.config.configurator import StartupConfiguration
+
+
+def profile_imports(module: str) -> List[Tuple[str, int, int]]:
+    """
+    функция замера времени импорта модуля в отдельном процессе средствами python -X importtime
+    :param module: -> str имя модуля
+    :return: -> list записи (модуль, собственное время мкс, суммарное время мкс) в порядке импорта
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(result.stderr)
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        records.append((name.strip(), int(self_time), int(cumulative_time)))
+    return records
+
+
+def main() -> int:
+    conf = StartupConfiguration()
+    parser = argparse.ArgumentParser(description='Import time per module and startup budget check')
+    parser.add_argument('--module', default=conf.module, help='module imported at bot start')
+    parser.add_argument('--budget', type=float, default=conf.budget, help='startup budget, seconds')
+    parser.add_argument('--top', type=int, default=20, help='number of slowest modules to show')
+    args = parser.parse_args()
+
+    records = profile_imports(args.module)
+    for name, self_time, cumulative_time in sorted(records, key=lambda record: -record[2])[:args.top]:
+        print(f'{cumulative_time / 1e6:8.3f}s {self_time / 1e6:8.3f}s  {name}')
+    total = next(cumulative for name, _, cumulative in records if name == args.module) / 1e6
+    print(f'{args.module} import time: {total:.3f}s, budget: {args.budget:.3f}s')
+    return 0 if total <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
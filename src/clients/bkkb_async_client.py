@@ -0,0 +1,111 @@
+import json
+from typing import Optional, TYPE_CHECKING
+
+from src.clients.base_api_class import BankAPI
+from src.clients.bkkb_client import chart_url_keyword
+from src.config.configurator import BKKBConfiguration
+from src.utils.lazy_import import lazy_module
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+aiohttp = lazy_module('aiohttp')
+
+
+class BKKBAsyncResponse:
+    """
+    класс прочитанного ответа асинхронного запроса. повторяет используемую контроллерами часть
+    интерфейса requests.Response: status_code, reason, text и json()
+    """
+
+    def __init__(self, status_code: int, reason: Optional[str], content: bytes):
+        self.status_code = status_code
+        self.reason = reason
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncBKKBClient(BankAPI):
+    """
+    Реализация класса асинхронных запросов по API BangkokBank.
+    запросы не блокируют цикл событий, соединения переиспользуются из пула aiohttp
+    """
+
+    def __init__(self, conf: BKKBConfiguration):
+        """
+        :param conf: -> BKKBConfiguration настройки подключения к API банка
+        """
+        self.conf = conf
+        self.token = self.conf.token
+        self.url = self.conf.url
+        self._session: Optional['ClientSession'] = None
+
+    @property
+    def headers(self):
+        return {'Ocp-Apim-Subscription-Key': self.token, }
+
+    @property
+    def session(self) -> 'ClientSession':
+        """
+        сессия создается при первом запросе, так как должна принадлежать работающему циклу событий
+        :return: -> ClientSession пул keep-alive соединений
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.conf.pool_size),
+                timeout=aiohttp.ClientTimeout(connect=self.conf.connect_timeout, sock_read=self.conf.read_timeout),
+            )
+        return self._session
+
+    async def get_data(self, url_keyword: str) -> BKKBAsyncResponse:
+        """
+        метод осуществляющий асинхронный запрос GET по ключевому слову в соовтетсвии с API документацией
+        :param url_keyword: слово определяющее вызываемый метод API банка
+        :return: BKKBAsyncResponse - результат запроса
+        """
+        async with self.session.get(self.url + '/' + url_keyword, headers=self.headers) as response:
+            return BKKBAsyncResponse(response.status, response.reason, await response.read())
+
+    async def close(self):
+        """
+        метод закрытия пула соединений
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_last_update(self) -> BKKBAsyncResponse:
+        """
+        метод получения последней даты обновления котировок
+        :return: BKKBAsyncResponse объект с данными о последних обновлениях котировок
+        """
+        return await self.get_data('GetDateTimeLastUpdate')
+
+    async def get_all_values_families(self) -> BKKBAsyncResponse:
+        """
+        метод получения всех названий семейств для все имеющихся валют
+        :return: BKKBAsyncResponse объект с данными о соотношении названия валюты с внутренним кодом
+        """
+        return await self.get_data('Getfxfamily')
+
+    async def get_latest_rates(self) -> BKKBAsyncResponse:
+        """
+        метод получения последних котировок всех семейств валют одним запросом
+        :return: BKKBAsyncResponse объект с данными котировок по всем колонкам курсов для каждого семейства
+        """
+        return await self.get_data('GetLatestfxrates')
+
+    async def get_last_all_rate_update_for_value(self, date_list: dict, family: str) -> BKKBAsyncResponse:
+        """
+        Метод определения котировок валют с настоящего времени по заданную дату
+        :param date_list:  -> dict: словарь с данными до какой даты необходимо искать данные по обновлению котировок
+        :param family:     -> str : значение семейства валюты, дял которой определяются котировки
+        :return: BKKBAsyncResponse объект с данными котировок валюты в заданный период времени
+        """
+        return await self.get_data(chart_url_keyword(date_list, family))
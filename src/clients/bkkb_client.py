@@ -1,11 +1,30 @@
 import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from src.clients.base_api_class import BankAPI
 from src.config.configurator import BKKBConfiguration
 
 
+def chart_url_keyword(date_list: dict, family: str) -> str:
+    """
+    функция формирования ключевого слова запроса котировок валюты с заданной даты по настоящее время
+    :param date_list:  -> dict: словарь с данными до какой даты необходимо искать данные по обновлению котировок
+    :param family:     -> str : значение семейства валюты, дял которой определяются котировки
+    :return: -> str ключевое слово GetChartfxrates
+    """
+    now = datetime.datetime.now()
+    tdd = now.day
+    tmm = now.month
+    tyyyy = now.year
+    fdd = date_list.get('day')
+    fmm = date_list.get('month')
+    fyyyy = date_list.get('year')
+    lang = 'en'
+    return f'GetChartfxrates/{fdd}/{fmm}/{fyyyy}/{tdd}/{tmm}/{tyyyy}/{family}/{lang}'
+
+
 class BKKBClient(BankAPI):
     """
     Реализация класса запросов по API BangkokBank
@@ -23,6 +42,12 @@ class BKKBClient(BankAPI):
         self.conf = conf
         self.token = self.conf.token
         self.url = self.conf.url
+        self.timeout = (self.conf.connect_timeout, self.conf.read_timeout)
+        # пул keep-alive соединений, соединения переиспользуются между запросами
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.conf.pool_connections, pool_maxsize=self.conf.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     @property
     def headers(self):
@@ -35,7 +60,13 @@ class BKKBClient(BankAPI):
         :param url_keyword: слово определяющее вызываемый метод API банка
         :return: HTTPResponse - результат запроса
         """
-        return requests.get(self.url + '/' + url_keyword, headers=self.headers)
+        return self.session.get(self.url + '/' + url_keyword, headers=self.headers, timeout=self.timeout)
+
+    def close(self):
+        """
+        метод закрытия пула соединений
+        """
+        self.session.close()
 
     def get_last_update(self):
         """
@@ -52,6 +83,13 @@ class BKKBClient(BankAPI):
         """
         return self.get_data('Getfxfamily')
 
+    def get_latest_rates(self):
+        """
+        метод получения последних котировок всех семейств валют одним запросом
+        :return: HTTPResponse объект с данными котировок по всем колонкам курсов для каждого семейства
+        """
+        return self.get_data('GetLatestfxrates')
+
     def get_last_all_rate_update_for_value(self, date_list: dict, family: str):
         """
         Метод определения котировок валют с настоящего времени по заданную дату
@@ -59,13 +97,4 @@ class BKKBClient(BankAPI):
         :param family:     -> str : значение семейства валюты, дял которой определяются котировки
         :return: HTTPResponse объект с данными котировок валюты в заданный период времени
         """
-        now = datetime.datetime.now()
-        tdd = now.day
-        tmm = now.month
-        tyyyy = now.year
-        fdd = date_list.get('day')
-        fmm = date_list.get('month')
-        fyyyy = date_list.get('year')
-        lang = 'en'
-        url_keyword = f'GetChartfxrates/{fdd}/{fmm}/{fyyyy}/{tdd}/{tmm}/{tyyyy}/{family}/{lang}'
-        return self.get_data(url_keyword)
+        return self.get_data(chart_url_keyword(date_list, family))
@@ -1,3 +1,9 @@
 # константы для валюты обмена USD
 TICKER_USD = 'USD000UTSTOM'
 FIGI_USD = 'BBG0013HGFT4'
+
+# период хранения часовых свечей
+CANDLES_HISTORY_DAYS = 3
+
+# классы инструментов брокера, по которым строится справочник FIGI
+INSTRUMENT_TYPES = ('shares', 'bonds', 'etfs', 'currencies', 'futures')
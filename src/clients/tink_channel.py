@@ -0,0 +1,75 @@
+import threading
+from typing import Optional, TYPE_CHECKING
+
+from src.utils.bad_auth_exception import BadAuthException
+from src.utils.http_tink_utils import logger_tinkoff_logs
+from src.utils.lazy_import import lazy_module
+
+if TYPE_CHECKING:
+    from tinkoff.invest import Client
+    from tinkoff.invest.services import Services
+
+invest = lazy_module('tinkoff.invest')
+
+
+class TinkoffChannel:
+    """
+    класс долгоживущего gRPC подключения к клиенту брокера Тинькофф.
+    подключение открывается один раз, авторизация проверяется один раз при открытии
+    и повторно только после ошибки авторизации (после вызова reset)
+    """
+
+    def __init__(self, token: str):
+        """
+        :param token: -> str токен подключения к клиенту
+        """
+        self.token = token
+        self._client: Optional['Client'] = None
+        self._services: Optional['Services'] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._services is not None
+
+    @property
+    def services(self) -> 'Services':
+        """
+        общий объект сервисов клиента. при первом обращении открывает канал и проверяет авторизацию
+        :return: -> Services сервисы клиента Тинькофф поверх общего канала
+        """
+        with self._lock:
+            if self._services is None:
+                self._open()
+            return self._services
+
+    def _open(self):
+        client = invest.Client(self.token)
+        services = client.__enter__()
+        # проверка авторизации выполняется один раз на открытие канала
+        try:
+            services.users.get_accounts()
+        except invest.RequestError as e:
+            client.__exit__(None, None, None)
+            error_message = e.metadata.message
+            logger_tinkoff_logs.error(error_message)
+            raise BadAuthException(error_message)
+        self._client, self._services = client, services
+        logger_tinkoff_logs.debug('TINKOFF CHANNEL HAS BEEN OPENED')
+
+    def reset(self):
+        """
+        закрытие канала после ошибки авторизации. следующее обращение откроет канал и проверит токен заново
+        """
+        with self._lock:
+            self._close()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._client is not None:
+            self._client.__exit__(None, None, None)
+            logger_tinkoff_logs.debug('TINKOFF CHANNEL HAS BEEN CLOSED')
+        self._client, self._services = None, None
@@ -1,16 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import timedelta
-from typing import Optional
-
-from tinkoff.invest import Client, CandleInterval
-from tinkoff.invest.services import InstrumentsService
-from tinkoff.invest.utils import now
+from typing import Optional, ContextManager, Dict, List, TYPE_CHECKING
 
 from src.clients.base_api_class import BankAPI
-from src.clients.const import FIGI_USD
+from src.clients.const import FIGI_USD, CANDLES_HISTORY_DAYS, INSTRUMENT_TYPES
+from src.clients.tink_channel import TinkoffChannel
 from src.config.configurator import TinkBankConfiguration
+from src.storage.candle_array import CandleArray
+from src.storage.candle_store import CandleStore
+from src.storage.instrument_catalog import InstrumentCatalog
+from src.utils.lazy_import import lazy_module
+from src.utils.rate_limiter import RateLimiter
 
 from src.utils.http_tink_utils import logger_tinkoff_logs, check_status_client
 
+if TYPE_CHECKING:
+    from tinkoff.invest.services import Services
+
+# SDK брокера загружается при первом запросе
+invest = lazy_module('tinkoff.invest')
+invest_utils = lazy_module('tinkoff.invest.utils')
+
 
 class TinkoffBankClient(BankAPI):
     """
@@ -25,62 +36,112 @@ class TinkoffBankClient(BankAPI):
         """
         self.conf = conf
         self.token_name = self.conf.token
+        # общий канал для всех запросов клиента, авторизация проверяется при его открытии
+        self.channel = TinkoffChannel(self.token_name)
+        # локальное хранилище свечей, запросы к API делаются только за период после последней свечи
+        self.candle_store = CandleStore(history=timedelta(days=CANDLES_HISTORY_DAYS))
+        # справочник инструментов, сохраненный на диске
+        self.catalog = InstrumentCatalog(self, self.conf.catalog_path, timedelta(hours=self.conf.catalog_ttl_hours))
+        # ограничение частоты запросов свечей в рамках минутной квоты брокера
+        self.candles_limiter = RateLimiter(self.conf.candles_requests_per_minute, period=60)
 
     @check_status_client()
-    def get_data(self) -> Client:
-        return Client(self.token_name)
+    def get_data(self) -> ContextManager['Services']:
+        """
+        метод получения сервисов клиента поверх общего канала.
+        контекстный менеджер не закрывает канал при выходе, канал переиспользуется следующими запросами
+        :return: -> ContextManager[Services] сервисы клиента Тинькофф
+        """
+        return nullcontext(self.channel.services)
+
+    def close(self):
+        """
+        метод закрытия общего канала клиента
+        """
+        self.channel.close()
 
+    @check_status_client()
     def get_all_figi_list(self) -> Optional[list]:
         """
         метод получения соотношения Тикетов валют, их названий и кода валюты FIGI для дальнейших корректных запросов
+        классы инструментов запрашиваются параллельно через общий канал
         :return: -> list() список данных по каждой валюте, по которой проходят торговые операции
         """
         # поиск всех валют по которым проходят торговые операции(method), все данные хранятся во внутреннем классе
-        list_of_all_ticker_figi = list()
         with self.get_data() as cl:
-            instruments: InstrumentsService = cl.instruments
-            for method in ['shares', 'bonds', 'etfs', 'currencies', 'futures']:
-                for item in getattr(instruments, method)().instruments:
-                    list_of_all_ticker_figi.append({
-                        'ticker': item.ticker,
-                        'figi': item.figi,
-                        'type': method,
-                        'name': item.name,
-                    })
+            instruments = cl.instruments
+
+            def get_instruments(method: str) -> list:
+                return [{
+                    'ticker': item.ticker,
+                    'figi': item.figi,
+                    'type': method,
+                    'name': item.name,
+                } for item in getattr(instruments, method)().instruments]
+
+            with ThreadPoolExecutor(max_workers=len(INSTRUMENT_TYPES)) as executor:
+                results = list(executor.map(get_instruments, INSTRUMENT_TYPES))
+        list_of_all_ticker_figi = [item for result in results for item in result]
         logger_tinkoff_logs.debug('''ALL FIGI'S LIST HAVE BEEN FOUND''')
         return list_of_all_ticker_figi
 
-    def get_candles_by_figi(self, figi: str) -> Optional[list]:
+    @check_status_client()
+    def get_candles_by_figi(self, figi: str) -> Optional[CandleArray]:
         """
         метод получения свечей по заданному коду FIGI
         период отслеживания данных в течении последних 3-х дней
         данные свечей - часовые свечи
+        с API запрашиваются только свечи начиная с последней сохраненной (незакрытая свеча будет заменена),
+        результат сливается с локальным хранилищем свечей
         при изменении параметров могут возникнуть ошибки перегрузки запросов и блокировка со стороны Тинькофф клиента
         :param figi: -> Str строковое обозначение код-ключа FIGI
-        :return: -> List список данных часовых свечей в течении 3-х дней
+        :return: -> CandleArray часовые свечи в течении 3-х дней из хранилища
         """
-
+        last_time = self.candle_store.last_time(figi)
+        from_ = invest_utils.now() - timedelta(days=CANDLES_HISTORY_DAYS) if last_time is None else last_time
         # поиск информации японских торговых свечей для определенной валюты. Код валюты передается через FIGI
         # для реализации используется внутренний класс MarketDataService
+        self.candles_limiter.acquire()
         with self.get_data() as client:
             response = client.market_data.get_candles(
                 figi=figi,
-                from_=now() - timedelta(days=3),
-                to=now(),
-                interval=CandleInterval.CANDLE_INTERVAL_HOUR
+                from_=from_,
+                to=invest_utils.now(),
+                interval=invest.CandleInterval.CANDLE_INTERVAL_HOUR
             )
+        candles = self.candle_store.merge(figi, response.candles)
         # проверка ответа на корректность исходного запроса
-        if len(response.candles) == 0:
+        if not candles:
             logger_tinkoff_logs.error('FIGI IS WRONG. NO CANDLES HAVE BEEN FOUNDED')
             return None
-        logger_tinkoff_logs.debug('CANDLES INFO FOR FIGI %s HAVE BEEN FOUND', figi)
-        return response.candles
+        logger_tinkoff_logs.debug('CANDLES INFO FOR FIGI %s HAVE BEEN FOUND. NEW CANDLES: %s', figi,
+                                  len(response.candles))
+        return candles
+
+    def get_candles_by_figi_list(self, figi_list: List[str]) -> Dict[str, Optional[CandleArray]]:
+        """
+        метод получения свечей сразу для нескольких кодов FIGI.
+        запросы выполняются параллельно через общий канал, частота запросов ограничена минутной квотой.
+        ошибка запроса одного FIGI не отменяет результаты остальных
+        :param figi_list: -> List список кодов FIGI
+        :return: -> Dict словарь FIGI - часовые свечи (None если свечи не найдены или запрос не удался)
+        """
+        with ThreadPoolExecutor(max_workers=self.conf.candles_workers) as executor:
+            futures = {figi: executor.submit(self.get_candles_by_figi, figi) for figi in figi_list}
+        candles = dict()
+        for figi, future in futures.items():
+            try:
+                candles[figi] = future.result()
+            except Exception as e:
+                logger_tinkoff_logs.error('CANDLES REQUEST FOR FIGI %s FAILED: %r', figi, e)
+                candles[figi] = None
+        return candles
 
-    def get_usd_candles(self) -> Optional[list]:
+    def get_usd_candles(self) -> Optional[CandleArray]:
         """
         метод получения свечей для валюты USD
         для осуществления необходимо знать точное значение FIGI_USD
-        :return: -> List список данных часовых свечей для USD в течении 3-х дней
+        :return: -> CandleArray часовые свечи для USD в течении 3-х дней
         """
         logger_tinkoff_logs.debug('CANDLES INFO FOR USD HAVE BEEN FOUND')
         return self.get_candles_by_figi(FIGI_USD)
@@ -0,0 +1,159 @@
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Dict, Tuple
+
+from src.clients.tink_channel import TinkoffChannel
+from src.storage.candle_store import CandleStore
+from src.utils.calculation_utils import cast_money
+from src.utils.http_tink_utils import logger_tinkoff_logs
+from src.utils.lazy_import import lazy_module
+
+invest = lazy_module('tinkoff.invest')
+invest_utils = lazy_module('tinkoff.invest.utils')
+
+
+class StreamSource(ABC):
+    """
+    источник потока рыночных данных. поток возвращает объекты MarketDataResponse
+    """
+
+    @abstractmethod
+    def stream(self, figis: List[str]) -> Iterable:
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class TinkoffStreamSource(StreamSource):
+    """
+    поток рыночных данных брокера Тинькофф поверх общего канала клиента.
+    подписка на часовые свечи и последние цены заданных FIGI
+    """
+
+    def __init__(self, channel: TinkoffChannel):
+        self.channel = channel
+        self._manager = None
+
+    def stream(self, figis: List[str]) -> Iterable:
+        # при переподключении предыдущий поток останавливается, иначе его поток и подписки остаются открытыми
+        self.close()
+        self._manager = self.channel.services.create_market_data_stream()
+        self._manager.candles.subscribe([
+            invest.CandleInstrument(figi=figi, interval=invest.SubscriptionInterval.SUBSCRIPTION_INTERVAL_ONE_HOUR)
+            for figi in figis
+        ])
+        self._manager.last_price.subscribe([invest.LastPriceInstrument(figi=figi) for figi in figis])
+        return self._manager
+
+    def close(self):
+        if self._manager is not None:
+            self._manager.stop()
+            self._manager = None
+
+
+class FakeStreamSource(StreamSource):
+    """
+    локальный источник потока для работы без подключения к брокеру.
+    каждое подключение отдает следующую пачку ответов. если пачка - исключение, подключение обрывается с ним.
+    после последней пачки поток ожидает закрытия источника
+    """
+
+    def __init__(self, batches: list):
+        """
+        :param batches: -> list список пачек ответов MarketDataResponse или исключений
+        """
+        self.batches = queue.Queue()
+        for batch in batches:
+            self.batches.put(batch)
+        self.connections = 0
+        self.exhausted = threading.Event()
+        self._closed = threading.Event()
+
+    def stream(self, figis: List[str]) -> Iterable:
+        self.connections += 1
+        try:
+            batch = self.batches.get_nowait()
+        except queue.Empty:
+            self.exhausted.set()
+            self._closed.wait()
+            return
+        if isinstance(batch, Exception):
+            raise batch
+        for response in batch:
+            yield response
+
+    def close(self):
+        self._closed.set()
+
+
+class MarketDataStreamer:
+    """
+    класс фонового чтения потока рыночных данных.
+    часовые свечи сливаются в хранилище свечей, последние цены хранятся в памяти.
+    при обрыве потока подписка восстанавливается через заданную паузу
+    """
+
+    def __init__(self, source: StreamSource, store: CandleStore, figis: List[str], reconnect_delay: float = 5):
+        """
+        :param source: -> StreamSource источник потока
+        :param store: -> CandleStore хранилище свечей, которое обновляется из потока
+        :param figis: -> list список FIGI для подписки
+        :param reconnect_delay: -> float пауза перед повторной подпиской, секунды
+        """
+        self.source = source
+        self.store = store
+        self.figis = figis
+        self.reconnect_delay = reconnect_delay
+        self.last_prices: Dict[str, Tuple[float, object]] = dict()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='tinkoff-market-data-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self.source.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def get_last_price(self, figi: str) -> Optional[float]:
+        price = self.last_prices.get(figi)
+        return None if price is None else price[0]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for response in self.source.stream(self.figis):
+                    if self._stop.is_set():
+                        break
+                    self.handle(response)
+                logger_tinkoff_logs.error('MARKET DATA STREAM HAS BEEN CLOSED')
+            except Exception as e:
+                logger_tinkoff_logs.error('MARKET DATA STREAM HAS BEEN DROPPED: %s', e)
+            # повторная подписка после обрыва потока
+            self._stop.wait(self.reconnect_delay)
+
+    def handle(self, response):
+        """
+        метод обработки одного ответа потока
+        :param response: -> MarketDataResponse ответ потока рыночных данных
+        """
+        if response.candle is not None:
+            self.store.merge(response.candle.figi, [response.candle])
+            logger_tinkoff_logs.debug('STREAM CANDLE FOR FIGI %s HAS BEEN RECEIVED', response.candle.figi)
+        if response.last_price is not None:
+            last_price = response.last_price
+            self.last_prices[last_price.figi] = (cast_money(last_price.price), last_price.time or invest_utils.now())
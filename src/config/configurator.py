@@ -1,15 +1,33 @@
+from typing import List
+
 from pydantic import Field
 
+from src.clients.const import FIGI_USD
 from src.config.base_configurator import BaseConfiguration
 
 
 class BKKBConfiguration(BaseConfiguration):
     token: str = Field(default='', env='TOKEN_BANGKOK')
     url: str = Field(default='', env='BKKB_URL')
+    pool_connections: int = Field(default=1, env='BKKB_POOL_CONNECTIONS')
+    pool_size: int = Field(default=4, env='BKKB_POOL_SIZE')
+    connect_timeout: float = Field(default=3.05, env='BKKB_CONNECT_TIMEOUT')
+    read_timeout: float = Field(default=10, env='BKKB_READ_TIMEOUT')
+    family_ttl_hours: float = Field(default=24, env='BKKB_FAMILY_TTL_HOURS')
+    history_path: str = Field(default='data/bkkb_history', env='BKKB_HISTORY_PATH')
+    refresh_interval: float = Field(default=55 * 60, env='BKKB_REFRESH_INTERVAL')
 
 
 class TinkBankConfiguration(BaseConfiguration):
     token: str = Field(default='', env='TOKEN_TINK')
+    streaming: bool = Field(default=False, env='TINK_STREAMING')
+    stream_figis: List[str] = Field(default=[FIGI_USD], env='TINK_STREAM_FIGIS')
+    stream_reconnect_delay: float = Field(default=5, env='TINK_STREAM_RECONNECT_DELAY')
+    catalog_path: str = Field(default='data/tinkoff_instruments.json.gz', env='TINK_CATALOG_PATH')
+    catalog_ttl_hours: float = Field(default=24, env='TINK_CATALOG_TTL_HOURS')
+    candles_requests_per_minute: int = Field(default=300, env='TINK_CANDLES_REQUESTS_PER_MINUTE')
+    candles_workers: int = Field(default=4, env='TINK_CANDLES_WORKERS')
+    refresh_interval: float = Field(default=55 * 60, env='TINK_REFRESH_INTERVAL')
 
 
 class TelegramConfiguration(BaseConfiguration):
@@ -22,13 +40,27 @@ class HerokuConfiguration(BaseConfiguration):
 
 
 class ExchangeConvertorConfiguration(BaseConfiguration):
-    tinkoff: TinkBankConfiguration = TinkBankConfiguration()
-    bkkbbank: BKKBConfiguration = BKKBConfiguration()
+    tinkoff: TinkBankConfiguration = Field(default_factory=TinkBankConfiguration)
+    bkkbbank: BKKBConfiguration = Field(default_factory=BKKBConfiguration)
+    refresh_ahead: bool = Field(default=False, env='RATES_REFRESH_AHEAD')
+    refresh_jitter: float = Field(default=30, env='RATES_REFRESH_JITTER')
+    refresh_retry_delay: float = Field(default=60, env='RATES_REFRESH_RETRY_DELAY')
+    rate_cache: str = Field(default='memory', env='RATES_CACHE')
+    rate_cache_path: str = Field(default='data/rates_cache.sqlite3', env='RATES_CACHE_PATH')
+    quote_history_path: str = Field(default='data/quotes.sqlite3', env='QUOTE_HISTORY_PATH')
+    quote_history_interval: float = Field(default=60, env='QUOTE_HISTORY_INTERVAL')
+    quote_history_days: float = Field(default=90, env='QUOTE_HISTORY_DAYS')
+    chart_workers: int = Field(default=1, env='CHART_WORKERS')
 
 
 class AppConfiguration(BaseConfiguration):
-    telegram_conf: TelegramConfiguration = TelegramConfiguration()
-    exchange_conf: ExchangeConvertorConfiguration = ExchangeConvertorConfiguration()
+    telegram_conf: TelegramConfiguration = Field(default_factory=TelegramConfiguration)
+    exchange_conf: ExchangeConvertorConfiguration = Field(default_factory=ExchangeConvertorConfiguration)
+
+
+class StartupConfiguration(BaseConfiguration):
+    budget: float = Field(default=0.5, env='STARTUP_BUDGET')
+    module: str = Field(default='src.listener.telebot_listener', env='STARTUP_MODULE')
 
 
 class LoggerConfiguration(BaseConfiguration):
@@ -44,3 +76,8 @@ class BkkBLogerConfiguration(LoggerConfiguration):
 class TinkLogerConfiguration(LoggerConfiguration):
     name: str = Field(default='TINKLOGS', env='TINK_LOGS')
     log_file: str = Field(default='tinkoff_logs', env='TINK_LOGS_FILE')
+
+
+class ConvertorLogerConfiguration(LoggerConfiguration):
+    name: str = Field(default='CONVERTORLOGS', env='CONVERTOR_LOGS')
+    log_file: str = Field(default='convertor_logs', env='CONVERTOR_LOGS_FILE')
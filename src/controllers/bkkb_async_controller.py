@@ -0,0 +1,98 @@
+from typing import Optional, TYPE_CHECKING
+
+from src.clients.bkkb_async_client import AsyncBKKBClient, BKKBAsyncResponse
+from src.config.configurator import BKKBConfiguration
+from src.controllers.bkkb_controller import BKKBDataFrameFormat
+from src.storage.bkkb_rate_sheet import BKKBRateSheet
+from src.utils.http_bkkb_utils import check_status_async
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class AsyncBKKBDataFrameFormat(BKKBDataFrameFormat):
+    """
+    Реализация асинхронного варианта класса работы с данными API Bangkok Bank.
+    запросы выполняются через AsyncBKKBClient, разбор ответов, кэш семейств и история котировок
+    общие с синхронным классом
+    """
+
+    def __init__(self, conf: BKKBConfiguration):
+        # синхронный клиент не создается, запросы выполняет только AsyncBKKBClient
+        super(AsyncBKKBDataFrameFormat, self).__init__(conf, client=AsyncBKKBClient(conf))
+
+    @check_status_async(msg='GETTING INNER FAMILY VALUE DATA FAILED :')
+    async def get_all_values_family(self) -> BKKBAsyncResponse:
+        return await self.client.get_all_values_families()
+
+    @check_status_async(msg='GETTING RATE FOR CURRENCY IS FAILED :')
+    async def get_x_rate(self, date_list: dict, family: str) -> BKKBAsyncResponse:
+        return await self.client.get_last_all_rate_update_for_value(date_list, family)
+
+    @check_status_async(msg='GETTING LAST RATES UPDATE FAILED :')
+    async def get_last_update(self) -> BKKBAsyncResponse:
+        return await self.client.get_last_update()
+
+    @check_status_async(msg='GETTING LATEST RATES FAILED :')
+    async def get_latest_rates(self) -> BKKBAsyncResponse:
+        return await self.client.get_latest_rates()
+
+    async def format_update_data(self) -> Optional[dict]:
+        """
+        Метод получения даты последнего обновления котировок валют банка
+        :return: ->dict: словарь с данными последней даты обновления котировок
+        """
+        return self.parse_update_data(await self.get_last_update())
+
+    async def format_all_values_family(self) -> Optional['DataFrame']:
+        """
+        Метод получения справочника всех семейств валют с учетом срока кэширования
+        :return: -> DataFrame объект с данными всех семейств валют
+        """
+        if not self.is_families_expired:
+            return self._families
+        return self.cache_all_values_family(await self.get_all_values_family())
+
+    async def format_get_family_by_currency(self, currency: str) -> Optional[str]:
+        """
+        Метод поиска навзания семейства для определенной валюты по ее точному названию, определенному банком
+        :param currency: -> str название валюты
+        :return: -> str название семейства для валюты
+        """
+        await self.format_all_values_family()
+        return self.find_family_by_currency(currency)
+
+    async def format_get_close_families_by_reg_name(self, reg_currency: str) -> Optional['DataFrame']:
+        """
+        Метод поиска возможных совпадений семейства и валют по ключевому слову
+        :param reg_currency: -> str название валюты
+        :return: -> DateFrame Объект возможных совпадений
+        """
+        await self.format_all_values_family()
+        return self.find_close_families_by_reg_name(reg_currency)
+
+    async def format_get_x_rate(self, date_list: dict, family: str, rate_info: str = "TT") -> Optional[tuple]:
+        """
+        Метод определения котировок обмена валют
+        :param date_list:   -> dict словарь времени с которого необходимо отслеживать изменения курса
+        :param family:      -> str семейство валюты
+        :param rate_info:   -> str код курса обмена валют в зависимости от статус клиента банка
+        :return:            -> tuple значение котировок с данными последнего обновления
+        """
+        if date_list is None or family is None:
+            return None, None
+        response = await self.get_x_rate(self.get_missing_date_list(date_list, family), family)
+        return self.merge_x_rate(family, response, rate_info)
+
+    async def format_rate_sheet(self, update_data: Optional[dict] = None) -> BKKBRateSheet:
+        """
+        Метод получения листа котировок всех семейств одним запросом
+        :param update_data: -> dict дата последнего обновления котировок из format_update_data
+        :return: -> BKKBRateSheet лист котировок по всем колонкам курсов
+        """
+        if update_data is not None and update_data == self._rate_sheet_update and len(self.rate_sheet):
+            return self.rate_sheet
+        return self.cache_rate_sheet(await self.get_latest_rates(), update_data)
+
+    async def close(self):
+        await self.client.close()
@@ -1,12 +1,21 @@
-from typing import Optional
+import datetime
+import re
+from typing import Optional, TYPE_CHECKING
 
-import pandas as pd
-from pandas import DataFrame
 from requests import Response
 
 from src.clients.bkkb_client import BKKBClient
 from src.config.configurator import BKKBConfiguration
+from src.storage.bkkb_rate_history import BKKBRateHistory, row_date
+from src.storage.bkkb_rate_sheet import BKKBRate, BKKBRateSheet, parse_rate
 from src.utils.http_bkkb_utils import check_status, logger_bkkbanks_logs
+from src.utils.lazy_import import lazy_module
+from src.utils.search_index import TrigramIndex
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+pd = lazy_module('pandas')
 
 
 class BKKBDataFrameFormat:
@@ -14,13 +23,30 @@ class BKKBDataFrameFormat:
     Реализация класса работы с данными по завершению API запросов
     """
 
-    def __init__(self, conf: BKKBConfiguration):
+    def __init__(self, conf: BKKBConfiguration, client=None):
         """
         Инициализация клиента для работы с API банком
-        :param token_name: название переменной для передачи значения токена из env файла
+        :param conf: -> BKKBConfiguration настройки подключения к API банка
+        :param client: -> клиент API банка, по умолчанию создается BKKBClient
         """
         self.conf = conf
-        self.client = BKKBClient(self.conf)
+        self.client = client if client is not None else BKKBClient(self.conf)
+        # справочник семейств валют кэшируется на время family_ttl_hours вместе с индексами поиска
+        self.family_ttl = datetime.timedelta(hours=self.conf.family_ttl_hours)
+        self._families: Optional['DataFrame'] = None
+        self._families_lower: Optional['DataFrame'] = None
+        self._families_time: Optional[datetime.datetime] = None
+        self._family_by_description = dict()
+        self._description_index: Optional[TrigramIndex] = None
+        # локальная история котировок, с API запрашиваются только даты после последней сохраненной
+        self.history = BKKBRateHistory(self.conf.history_path)
+        # лист котировок всех семейств и дата обновления банка, по которой он получен
+        self.rate_sheet = BKKBRateSheet()
+        self._rate_sheet_update: Optional[dict] = None
+
+    @property
+    def is_families_expired(self) -> bool:
+        return self._families_time is None or datetime.datetime.now() - self._families_time > self.family_ttl
 
     @check_status(msg='GETTING INNER FAMILY VALUE DATA FAILED :')
     def get_all_values_family(self) -> Response:
@@ -34,6 +60,10 @@ class BKKBDataFrameFormat:
     def get_last_update(self) -> Response:
         return self.client.get_last_update()
 
+    @check_status(msg='GETTING LATEST RATES FAILED :')
+    def get_latest_rates(self) -> Response:
+        return self.client.get_latest_rates()
+
     def format_update_data(self) -> Optional[dict]:
         """
         Метод форматирования данных запроса и формирования даты последнего обновления котировок валют банка по заданному
@@ -41,10 +71,19 @@ class BKKBDataFrameFormat:
         :return: ->dict: словарь с данными последней даты обновления котировок
         """
         # проверка статуса запроса и запись логов при ошибке
-        response = self.get_last_update()
+        return self.parse_update_data(self.get_last_update())
+
+    @staticmethod
+    def parse_update_data(response: Response) -> dict:
+        """
+        Метод разбора ответа GetDateTimeLastUpdate, общий для синхронного и асинхронного клиентов
+        :param response: -> Response ответ запроса последнего обновления котировок
+        :return: ->dict: словарь с данными последней даты обновления котировок
+        """
         # выбираем интересующие нас данные из json объекта
-        last_date_update = response.json()[0].get("Day").split('/')
-        time_update = response.json()[0].get("Time")
+        update = response.json()[0]
+        last_date_update = update.get("Day").split('/')
+        time_update = update.get("Time")
         # запись логов удачного результат
 
         logger_bkkbanks_logs.debug('LAST BANGKOKBANK UPDATE RATE %s - %s', last_date_update, time_update)
@@ -55,19 +94,39 @@ class BKKBDataFrameFormat:
             last_time_update=time_update
         )
 
-    def format_all_values_family(self) -> Optional[DataFrame]:
+    def format_all_values_family(self) -> Optional['DataFrame']:
         """
         Метод форматирования данных запроса всех семейств валют.
+        справочник запрашивается повторно только после истечения срока кэширования
+        :return: -> DataFrame объект с данными всех семейств валют
+        """
+        if not self.is_families_expired:
+            return self._families
+        return self.cache_all_values_family(self.get_all_values_family())
+
+    def cache_all_values_family(self, response: Response) -> 'DataFrame':
+        """
+        Метод разбора ответа Getfxfamily и кэширования справочника семейств вместе с индексами поиска
+        :param response: -> Response ответ запроса всех семейств валют
         :return: -> DataFrame объект с данными всех семейств валют
         """
-        response = self.get_all_values_family()
         # формирование DataFrame объекта средствами pandas, настройка с отображением всех данных в логах
-        bangkok_bank_inner_families_values = DataFrame(response.json())
+        bangkok_bank_inner_families_values = pd.DataFrame(response.json())
         # max.rows рекомендуется указать не более 30. Без натройки None отображение будет в свернутом виде
         pd.set_option('display.max_rows', None)
         # запись логов удачного результат
         logger_bkkbanks_logs.debug('ALL INNER FAMILIES VALUES HAVE BEEN RECEIVED \n%s',
                                    bangkok_bank_inner_families_values)
+        # индексы точного поиска по названию и поиска по подстроке в нижнем регистре
+        self._family_by_description = dict()
+        for description, family in zip(bangkok_bank_inner_families_values['Description'],
+                                       bangkok_bank_inner_families_values['Family']):
+            self._family_by_description.setdefault(description, family)
+        self._families_lower = bangkok_bank_inner_families_values.copy()
+        self._families_lower['Description'] = self._families_lower['Description'].str.lower()
+        self._description_index = TrigramIndex(self._families_lower['Description'].tolist())
+        self._families = bangkok_bank_inner_families_values
+        self._families_time = datetime.datetime.now()
         return bangkok_bank_inner_families_values
 
     def format_get_family_by_currency(self, currency: str) -> Optional[str]:
@@ -76,38 +135,87 @@ class BKKBDataFrameFormat:
         :param currency: -> str название валюты
         :return: -> str название семейства для валюты
         """
+        self.format_all_values_family()
+        return self.find_family_by_currency(currency)
 
-        data_frame = self.format_all_values_family()
-        # производим поиск по полю Description
-        currency_frame = data_frame.loc[data_frame['Description'] == currency]
+    def find_family_by_currency(self, currency: str) -> Optional[str]:
+        """
+        Метод поиска семейства валюты по загруженному справочнику семейств
+        :param currency: -> str название валюты
+        :return: -> str название семейства для валюты
+        """
+        # производим поиск по индексу поля Description
+        format_family_currency = self._family_by_description.get(currency)
         # проверяем результат поиска на наличие результата
-        if len(currency_frame['Family']) == 0:
+        if format_family_currency is None:
             logger_bkkbanks_logs.error('FAMILY FOR %s VALUE HAS NOT BEEN FOUND:', currency)
             return None
-        # определяем требуемое значение из DataFrame объекта
-        format_family_currency = currency_frame['Family'].loc[currency_frame.index[0]]
         # запись логов удачного результат
         logger_bkkbanks_logs.debug('FAMILY FOR %s VALUE HAS BEEN RECEIVED: %s', currency, format_family_currency)
         return format_family_currency
 
-    def format_get_close_families_by_reg_name(self, reg_currency: str) -> Optional[DataFrame]:
+    def format_get_close_families_by_reg_name(self, reg_currency: str) -> Optional['DataFrame']:
         """
         Метод поиска возможных совпадений семейства и валют по ключевому слову.
         поиск происходит по регулярному выражению
         :param reg_currency: -> str название валюты
         :return: -> DateFrame Объект возможных совпадений
         """
-        # поиск всех семейств валют
-        data_frame = self.format_all_values_family()
-        # форматирование значение по нижнему регистру для предотвращения опечаток
-        data_frame['Description'] = data_frame['Description'].str.lower()
-        # фильтрация данных по требуемому ключевому значению
-        format_families_by_reg = data_frame[
-            data_frame['Description'].str.match(f"((.*)({reg_currency.lower()}).*)")==True]
+        self.format_all_values_family()
+        return self.find_close_families_by_reg_name(reg_currency)
+
+    def find_close_families_by_reg_name(self, reg_currency: str) -> Optional['DataFrame']:
+        """
+        Метод поиска возможных совпадений семейства и валют по загруженному справочнику семейств
+        :param reg_currency: -> str название валюты
+        :return: -> DateFrame Объект возможных совпадений
+        """
+        # значения Description справочника заранее приведены к нижнему регистру
+        data_frame = self._families_lower
+        reg_currency = reg_currency.lower()
+        if re.escape(reg_currency) == reg_currency:
+            # ключевое слово без специальных символов ищется по индексу подстрок
+            format_families_by_reg = data_frame.iloc[self._description_index.contains(reg_currency)]
+        else:
+            # фильтрация данных по требуемому регулярному выражению
+            format_families_by_reg = data_frame[
+                data_frame['Description'].str.match(f"((.*)({reg_currency}).*)") == True]
         # запись логов удачного результат
         logger_bkkbanks_logs.debug('ALL FAMILIES CLOSE TO CURRENSY \n%s', format_families_by_reg)
         return format_families_by_reg
 
+    def get_missing_date_list(self, date_list: dict, family: str) -> dict:
+        """
+        Метод определения даты, с которой нужно запрашивать котировки. даты до последней сохраненной в истории
+        котировки повторно не запрашиваются, день последней котировки запрашивается для получения новых обновлений
+        :param date_list:   -> dict словарь даты, с которой требуются котировки
+        :param family:      -> str семейство валюты
+        :return:            -> dict словарь даты начала запроса
+        """
+        last_date = self.history.last_date(family)
+        if last_date is None:
+            return date_list
+        requested_date = datetime.date(int(date_list.get('year')), int(date_list.get('month')),
+                                       int(date_list.get('day')))
+        if last_date <= requested_date:
+            return date_list
+        return dict(day=f'{last_date.day:02d}', month=f'{last_date.month:02d}', year=str(last_date.year))
+
+    def format_get_rate_history(self, family: str, start: datetime.date, end: datetime.date,
+                                rate_info: str = "TT") -> list:
+        """
+        Метод получения истории котировок семейства за период без обращения к API
+        :param family:      -> str семейство валюты
+        :param start:       -> date начало периода
+        :param end:         -> date конец периода
+        :param rate_info:   -> str код курса обмена валют
+        :return:            -> list пары (дата, время, курс) в порядке обновления, строки без курса пропускаются
+        """
+        history = [(row_date(row), row.get('DTime'), parse_rate(row.get(rate_info)))
+                   for row in self.history.range(family, start, end)]
+        # строки без указанного курса ('-') в историю не попадают
+        return [row for row in history if row[2] is not None]
+
     def format_get_x_rate(self, date_list: dict, family: str, rate_info: str = "TT") -> Optional[tuple]:
         """
         Метод определения котировок обмена валют. по умолчанию значение ТТ определяем котировки для клиентов банка,
@@ -120,13 +228,32 @@ class BKKBDataFrameFormat:
         # проверка данных на ввод исключяем получения None
         if date_list is None or family is None:
             return None, None
-        response = self.get_x_rate(date_list, family)
+        response = self.get_x_rate(self.get_missing_date_list(date_list, family), family)
+        return self.merge_x_rate(family, response, rate_info)
+
+    def merge_x_rate(self, family: str, response: Response, rate_info: str = "TT") -> tuple:
+        """
+        Метод разбора ответа GetChartfxrates: новые строки сохраняются в историю, котировка берется из последней строки.
+        если в последней строке курс не указан ('-'), берется последняя строка истории с указанным курсом
+        :param family:      -> str семейство валюты
+        :param response:    -> Response ответ запроса котировок
+        :param rate_info:   -> str код курса обмена валют
+        :return:            -> tuple значение котировки и сообщение с данными последнего обновления
+        """
+        # новые строки дописываются в историю, последняя строка истории - последнее обновление курса
+        history = self.history.merge(family, response.json())
         # проверка статуса результата запроса
-        if len(response.json()) == 0:
+        if len(history) == 0:
+            return None, None
+        self.rate_sheet.update(history[-1:])
+        for data_needed in reversed(history):
+            tt_rate = BKKBRate.from_row(data_needed).get(rate_info)
+            if tt_rate is not None:
+                break
+        else:
+            logger_bkkbanks_logs.error('%s RATE FOR %s FAMILY HAS NOT BEEN FOUND', rate_info, family)
             return None, None
-        data_needed = response.json()[-1]
         date = data_needed.get('Ddate').split('/')
-        tt_rate = float(data_needed.get(rate_info))
         date = f"{date[1]}/{date[0]}/{date[2]}"
         time = data_needed.get('DTime')
         # запись логов удачного результат
@@ -135,3 +262,26 @@ class BKKBDataFrameFormat:
                      f"Update: {time} {date}\n" \
                      f"\n"
         return tt_rate, message_in
+
+    def format_rate_sheet(self, update_data: Optional[dict] = None) -> BKKBRateSheet:
+        """
+        Метод получения листа котировок всех семейств одним запросом. если дата обновления банка не изменилась,
+        возвращается ранее полученный лист
+        :param update_data: -> dict дата последнего обновления котировок из format_update_data
+        :return: -> BKKBRateSheet лист котировок по всем колонкам курсов
+        """
+        if update_data is not None and update_data == self._rate_sheet_update and len(self.rate_sheet):
+            return self.rate_sheet
+        return self.cache_rate_sheet(self.get_latest_rates(), update_data)
+
+    def cache_rate_sheet(self, response: Response, update_data: Optional[dict] = None) -> BKKBRateSheet:
+        """
+        Метод разбора ответа GetLatestfxrates. json ответа разбирается один раз
+        :param response: -> Response ответ запроса последних котировок
+        :param update_data: -> dict дата последнего обновления котировок
+        :return: -> BKKBRateSheet лист котировок
+        """
+        self.rate_sheet.update(response.json())
+        self._rate_sheet_update = update_data
+        logger_bkkbanks_logs.debug('RATE SHEET HAS BEEN RECEIVED FOR %s FAMILIES', len(self.rate_sheet))
+        return self.rate_sheet
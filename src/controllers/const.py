@@ -1,4 +1,16 @@
 RAIF_EX = 2.257
 SWIFT_RAIF = 3.0
 SWIFT_BKKB = 0.21
-BKK_USD_FAMILY = 'USD50'
\ No newline at end of file
+BKK_USD_FAMILY = 'USD50'
+EMA_WINDOW = 9
+# семейства USD по номиналу: минимальная сумма в USD, с которой действует курс семейства (по убыванию)
+BKK_USD_TIERS = ((50, 'USD50'), (5, 'USD5'), (1, 'USD1'))
+# пары истории котировок, RUB_THB_ZDV - курс RUB / THB с наценкой
+USD_RUB = 'USD_RUB'
+USD_THB = 'USD_THB'
+RUB_THB = 'RUB_THB'
+RUB_THB_ZDV = 'RUB_THB_ZDV'
+QUOTE_PAIRS = (USD_RUB, USD_THB, RUB_THB, RUB_THB_ZDV)
+# валюты сумм пакетной конвертации
+CONVERSION_CURRENCIES = ('RUB', 'THB')
+HISTORY_MAX_DAYS = 90
@@ -1,30 +1,59 @@
-from typing import Optional, Tuple
+import bisect
+import datetime
+from typing import Optional, Tuple, Dict, Union, TYPE_CHECKING
 
-import pandas as pd
-import pytz
-from pandas import DataFrame
-from ta.trend import ema_indicator
-
-from src.utils.calculation_utils import cast_money
+from src.controllers.const import EMA_WINDOW
+from src.utils.calculation_utils import IncrementalEma
 from src.clients.tink_client import logger_tinkoff_logs
+from src.storage.candle_array import CandleArray
+from src.storage.candle_store import CandleStore
+from src.storage.instrument_catalog import InstrumentCatalog
+from src.utils.lazy_import import lazy_module
+from src.utils.search_index import TrigramIndex
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# тяжелые зависимости загружаются при первом использовании
+pd = lazy_module('pandas')
+pytz = lazy_module('pytz')
+ta_trend = lazy_module('ta.trend')
+
 
 class TinkoffDataFrameFormat:
     """
     класс обработки данных запросов от клиента Тинькофф. Для удобства используется pandas
     """
-    pd.set_option('display.max_rows', 500)
-    pd.set_option('display.max_columns', 500)
-    pd.set_option('display.width', 1000)
 
     def __init__(self, list_of_all_ticker_figi: list):
         """
         метод инициализации класса
         :param list_of_all_ticker_figi: список дынных всех валют с информацие по названию / тикеру / figi-кода.
         """
+        pd.set_option('display.max_rows', 500)
+        pd.set_option('display.max_columns', 500)
+        pd.set_option('display.width', 1000)
         # преобразуем данные в DataFrame объет для удобства обращения
-        self.list_of_all_ticker_figi = DataFrame(list_of_all_ticker_figi)
+        self.list_of_all_ticker_figi = pd.DataFrame(list_of_all_ticker_figi, columns=['ticker', 'figi', 'type', 'name'])
+        # индексы строятся один раз: точный поиск по тикеру и FIGI, нечеткий поиск по названию
+        self.figi_by_ticker = dict()
+        for ticker, figi in zip(self.list_of_all_ticker_figi['ticker'], self.list_of_all_ticker_figi['figi']):
+            self.figi_by_ticker.setdefault(ticker, figi)
+        self.position_by_figi = dict()
+        for position, figi in enumerate(self.list_of_all_ticker_figi['figi']):
+            self.position_by_figi.setdefault(figi, position)
+        self.name_index = TrigramIndex(self.list_of_all_ticker_figi['name'].tolist())
 
-    def get_ticker_by_rex(self, rex_word: str) -> Optional[DataFrame]:
+    @classmethod
+    def from_catalog(cls, catalog: InstrumentCatalog) -> 'TinkoffDataFrameFormat':
+        """
+        метод создания объекта по сохраненному справочнику инструментов без обращения к API
+        :param catalog: -> InstrumentCatalog справочник инструментов
+        :return: -> TinkoffDataFrameFormat
+        """
+        return cls(catalog.get())
+
+    def get_ticker_by_rex(self, rex_word: str) -> Optional['DataFrame']:
         """
         метод позволяющий по ключевому выражению осуществить поиск близких совпадений для данных валюты.
         поиск осуществляется по ticker
@@ -39,29 +68,90 @@ class TinkoffDataFrameFormat:
         :param ticker: -> Str тикер валюты, необходимо точное совпадение
         :return: -> Str фиги-ключ для валюты
         """
-        data_frame_ticker_figi = self.list_of_all_ticker_figi[self.list_of_all_ticker_figi['ticker'] == ticker]
+        figi_for_ticker = self.figi_by_ticker.get(ticker)
         # проверка данных на соответсвие
-        if data_frame_ticker_figi.empty:
+        if figi_for_ticker is None:
             logger_tinkoff_logs.error('GETTING TICKER %s FAILED ', ticker)
             return None
-        figi_for_ticker = data_frame_ticker_figi['figi'].iloc[0]
         logger_tinkoff_logs.debug('FIGI FOR TICKER %s IS %s', ticker, figi_for_ticker)
         return figi_for_ticker
 
+    def get_by_figi(self, figi: str) -> Optional[dict]:
+        """
+        метод получения данных инструмента по figi-ключу
+        :param figi: -> Str фиги-ключ, необходимо точное совпадение
+        :return: -> Dict данные инструмента (ticker / figi / type / name)
+        """
+        position = self.position_by_figi.get(figi)
+        if position is None:
+            logger_tinkoff_logs.error('GETTING FIGI %s FAILED ', figi)
+            return None
+        return self.list_of_all_ticker_figi.iloc[position].to_dict()
+
+    def search_by_name(self, name: str, limit: int = 10) -> 'DataFrame':
+        """
+        метод нечеткого поиска инструментов по названию. результат отсортирован по степени совпадения
+        :param name: -> Str часть названия инструмента, допускаются опечатки
+        :param limit: -> Int максимальное количество результатов
+        :return: -> DataFrame объект с названием / тикетом / figi ключом и оценкой совпадения score
+        """
+        matches = self.name_index.search(name, limit=limit)
+        result = self.list_of_all_ticker_figi.iloc[[position for position, _ in matches]].copy()
+        result['score'] = [score for _, score in matches]
+        return result
+
 
 class CandlesDataFrame:
     """
     класс для обработки данных свечей валют
     """
 
-    def __init__(self, candles: list):
+    def __init__(self, candles, ema: Optional[IncrementalEma] = None):
         """
         метод инициализации
         :param candles: -> List список данных запроса японских свечей определнной валюты
+        или CandleArray свечи из хранилища, которые используются без повторного преобразования
+        :param ema: -> IncrementalEma состояние EMA валюты, сохраняемое между обновлениями.
+        если не передано, EMA рассчитывается по всей истории свечей
         """
         self.candles = candles
+        self.ema = IncrementalEma(window=EMA_WINDOW) if ema is None else ema
+        self._array = None
+
+    @property
+    def array(self) -> Optional[CandleArray]:
+        """
+        компактное представление свечей по колонкам, создается один раз при первом обращении
+        """
+        if isinstance(self.candles, CandleArray):
+            return self.candles
+        if self._array is None and self.candles:
+            self._array = CandleArray.from_candles(self.candles)
+        return self._array
 
-    def create_df(self) -> Optional[DataFrame]:
+    @classmethod
+    def from_store(cls, store: CandleStore, figi: str, ema: Optional[IncrementalEma] = None) -> 'CandlesDataFrame':
+        """
+        метод создания объекта по свечам из локального хранилища, без запросов к API.
+        массив свечей хранилища используется без копирования
+        :param store: -> CandleStore хранилище свечей
+        :param figi: -> Str код FIGI
+        :param ema: -> IncrementalEma состояние EMA валюты
+        :return: -> CandlesDataFrame объект свечей, None вместо массива если свечей нет
+        """
+        candles = store.get(figi)
+        return cls(candles if candles else None, ema)
+
+    @classmethod
+    def from_batch(cls, candles_by_figi: Dict[str, Optional[Union[list, CandleArray]]]) -> Dict[str, 'CandlesDataFrame']:
+        """
+        метод создания объектов по результату пакетного запроса свечей
+        :param candles_by_figi: -> Dict словарь FIGI - список свечей или CandleArray
+        :return: -> Dict словарь FIGI - CandlesDataFrame
+        """
+        return {figi: cls(candles) for figi, candles in candles_by_figi.items()}
+
+    def create_df(self) -> Optional['DataFrame']:
         """
         метод преобразования списка в DataFrame объект с выделением конкретной информации и преобразованием валют
         :return: -> DataFrame объект данных свечей с форматированными данными по стоимости
@@ -70,17 +160,9 @@ class CandlesDataFrame:
         # до 9 знака. для получения корректных котировок необходимо преобрпзовать данные
         if self.candles is None:
             return None
-        candles_df_data = DataFrame([{
-            'time': candle.time,
-            'volume': candle.volume,
-            'open': cast_money(candle.open),
-            'close': cast_money(candle.close),
-            'high': cast_money(candle.high),
-            'low': cast_money(candle.low),
-        } for candle in self.candles])
-        return candles_df_data
-
-    def get_xrates_ema_dataframe(self) -> Optional[DataFrame]:
+        return self.array.to_frame()
+
+    def get_xrates_ema_dataframe(self) -> Optional['DataFrame']:
         """
         Метод получения значения средней скользящей для котировок валюты. Значение EMA
         Подробнее и тех анализа трейдеров https://technical-analysis-library-in-python.readthedocs.io/en/latest/ta.html#ta.trend.ema_indicator
@@ -89,27 +171,56 @@ class CandlesDataFrame:
         if self.candles is None:
             return None
         candles_df_data = self.create_df()
-        candles_df_data['ema'] = ema_indicator(close=candles_df_data['close'], window=9)
+        candles_df_data['ema'] = ta_trend.ema_indicator(close=candles_df_data['close'], window=EMA_WINDOW)
         logger_tinkoff_logs.debug('RATES HAVE BEEN RECEIVED')
         return candles_df_data[['time', 'open', 'close', 'high', 'low', 'ema']].tail(30)
 
+    def sync_ema(self) -> Optional[float]:
+        """
+        Метод обновления состояния EMA. учитываются только свечи в конце истории, которые новее
+        последней учтенной свечи или совпадают с ней по времени. пустое состояние заполняется по всей истории
+        :return: -> float значение EMA, None пока свечей меньше окна
+        """
+        times, closes = self.array.times, self.array.closes
+        start = 0 if self.ema.last_time is None else int(times.searchsorted(self.ema.last_time))
+        for position in range(start, len(times)):
+            self.ema.update(int(times[position]), float(closes[position]))
+        return self.ema.value
+
+    def get_chart_series(self, start: Optional[datetime.datetime] = None) -> Optional[Tuple[list, list, list]]:
+        """
+        Метод получения рядов цен закрытия часовых свечей и EMA для графика.
+        EMA рассчитывается отдельным состоянием, состояние self.ema не изменяется
+        :param start: -> datetime время начала графика с часовым поясом, EMA учитывает и более ранние свечи
+        :return: -> tuple списки времени свечей (UTC), цен закрытия и EMA (None до заполнения окна),
+                   None - свечей после start нет
+        """
+        array = self.array
+        if array is None:
+            return None
+        ema = IncrementalEma(self.ema.window)
+        times = [array.time_at(position) for position in range(len(array.data))]
+        closes = array.closes.tolist()
+        ema_values = [ema.update(int(time), close) for time, close in zip(array.times, closes)]
+        first = bisect.bisect_left(times, start) if start is not None else 0
+        if first == len(times):
+            return None
+        return times[first:], closes[first:], ema_values[first:]
+
     def get_xrate_dict_format(self) -> Tuple[Optional[float], Optional[str]]:
         """
         Метод форматирования данных в формате словаря, с определением максимального текущего курса заданной валюты
+        EMA обновляется инкрементально только по новым и изменившимся свечам, DataFrame не создается
         :return: -> Dict словарь с данными максимальных котировок валюты с учетом EMA значением
         """
-        if self.candles is None:
-            return None, None
-        rates_data = self.get_xrates_ema_dataframe()
-        # проверка данных на соответствие
-        if rates_data is None:
-            logger_tinkoff_logs.error('GET RATE WAS CRUSHED')
+        if not self.candles:
             return None, None
+        ema = self.sync_ema()
         # смотрим последние данные для свечи заданной валюты.
-        data = rates_data.iloc[-1]
-        max_rate = max(data.open, data.close, data.high, data.low)
-        max_rate_with_ema = round(max(max_rate, data.ema), 2)
-        date = data.time
+        max_rate = self.array.max_price_at(-1)
+        # до заполнения окна EMA значение отсутствует и не учитывается
+        max_rate_with_ema = round(max_rate if ema is None else max(max_rate, ema), 2)
+        date = self.array.time_at(-1)
         dt_Moscow = date.astimezone(pytz.timezone('Europe/Moscow')).strftime('%H:%M  %d/%m/%Y')
         logger_tinkoff_logs.debug('GET RATE WAS ACCOMPLISHED. MAX RATE: %d', max_rate_with_ema)
         message_in = f"USD   : {max_rate}\n" \
@@ -1,9 +1,25 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict
+
+from requests import RequestException
 
 from src.config.configurator import BKKBConfiguration
-from src.controllers.const import BKK_USD_FAMILY
+from src.controllers.const import BKK_USD_FAMILY, BKK_USD_TIERS
 from src.controllers.bkkb_controller import BKKBDataFrameFormat
 from src.utils.bad_auth_exception import BadAuthException
+from src.utils.http_bkkb_utils import logger_bkkbanks_logs
+
+
+def usd_family_by_amount(usd_amount: float) -> str:
+    """
+    функция выбора семейства USD по сумме обмена
+    :param usd_amount: -> float сумма обмена в USD
+    :return: -> str семейство USD, курс которого действует для суммы
+    """
+    for min_amount, family in BKK_USD_TIERS:
+        if usd_amount >= min_amount:
+            return family
+    return BKK_USD_TIERS[-1][1]
 
 
 class LastUSDToTHBRates:
@@ -11,12 +27,45 @@ class LastUSDToTHBRates:
         # объявление клиента
         self.conf = conf
         self.client = BKKBDataFrameFormat(self.conf)
+        # последняя дата обновления котировок банка и полученный по ней курс
+        self.last_update: Optional[dict] = None
+        self.last_rates: Optional[tuple] = None
+        # курсы всех семейств USD, полученные по последней дате обновления
+        self.tier_rates: Dict[str, tuple] = dict()
+
+    def get_usd_to_thb_tier_rates(self, usd_last_update: dict) -> Dict[str, tuple]:
+        """
+        метод одновременного получения курсов всех семейств USD
+        :param usd_last_update: -> dict дата последнего обновления котировок банка
+        :return: -> dict курс и сообщение для каждого семейства USD
+        """
+        families = [family for _, family in BKK_USD_TIERS]
+        with ThreadPoolExecutor(max_workers=len(families)) as executor:
+            rates = list(executor.map(lambda family: self.client.format_get_x_rate(usd_last_update, family),
+                                      families))
+        return {family: rate for family, rate in zip(families, rates) if rate != (None, None)}
 
     def get_usd_to_thb_rates(self) -> Optional[tuple]:
         # определяем дату последнего обновления котировок
         try:
             usd_last_update = self.client.format_update_data()
-            # определяем курс обмена валюты USD в THB для внутреннго клиента банка
-        except BadAuthException:
+            # котировки банка не обновлялись, запрос графика курсов не нужен
+            if self.last_rates is not None and usd_last_update == self.last_update:
+                logger_bkkbanks_logs.debug('BANGKOKBANK RATES HAVE NOT BEEN UPDATED SINCE %s', usd_last_update)
+                return self.last_rates
+            # определяем курсы обмена валюты USD в THB для внутреннго клиента банка по всем семействам USD
+            tier_rates = self.get_usd_to_thb_tier_rates(usd_last_update)
+        except (BadAuthException, RequestException):
             return None
-        return self.client.format_get_x_rate(usd_last_update, BKK_USD_FAMILY)
+        rates = tier_rates.get(BKK_USD_FAMILY, (None, None))
+        if rates != (None, None):
+            self.last_update, self.last_rates, self.tier_rates = usd_last_update, rates, tier_rates
+        return rates
+
+    def get_tier_rate(self, usd_amount: float) -> Optional[tuple]:
+        """
+        метод получения курса семейства USD для суммы обмена без обращения к API
+        :param usd_amount: -> float сумма обмена в USD
+        :return: -> tuple курс и сообщение семейства, при отсутствии курса семейства - курс BKK_USD_FAMILY
+        """
+        return self.tier_rates.get(usd_family_by_amount(usd_amount), self.last_rates)
@@ -1,7 +1,11 @@
 from typing import Optional, Tuple
 
+from src.clients.const import FIGI_USD
 from src.clients.tink_client import TinkoffBankClient
+from src.clients.tink_stream import MarketDataStreamer, TinkoffStreamSource
+from src.controllers.const import EMA_WINDOW
 from src.controllers.tink_controller import CandlesDataFrame
+from src.utils.calculation_utils import IncrementalEma
 from src.utils.bad_auth_exception import BadAuthException
 from src.config.configurator import TinkBankConfiguration
 
@@ -17,18 +21,49 @@ class LastUSDToRUBRates:
         """
         self.conf = conf
         self.client = TinkoffBankClient(conf)
+        # состояния EMA по каждому FIGI, обновляются только по новым свечам
+        self.ema_states = {FIGI_USD: IncrementalEma(window=EMA_WINDOW)}
+        # в режиме потока свечи обновляются подпиской на рыночные данные, запросы к API не выполняются
+        self.streamer = MarketDataStreamer(
+            source=TinkoffStreamSource(self.client.channel),
+            store=self.client.candle_store,
+            figis=self.conf.stream_figis,
+            reconnect_delay=self.conf.stream_reconnect_delay,
+        ) if self.conf.streaming else None
+
+    @property
+    def streaming(self) -> bool:
+        return self.streamer is not None
+
+    def start_streaming(self):
+        """
+        метод запуска потока рыночных данных. история свечей загружается один раз перед подпиской
+        """
+        if self.streamer is None or self.streamer.is_running:
+            return
+        for figi in self.streamer.figis:
+            self.client.get_candles_by_figi(figi)
+        self.streamer.start()
 
     def get_usd_last_rate(self) -> Optional[Tuple[float, str]]:
         """
         метод формирования словаря, в котором будет определена информация по последнем курсу для USD
         :return: -> Dict() словарь с данными по котировкам
         """
-        # поиск свечей для валюты USD
+        if self.streaming:
+            # свечи для валюты USD уже находятся в хранилище, обновляемом потоком
+            try:
+                self.start_streaming()
+            except BadAuthException:
+                return None
+            usd_rates_data = CandlesDataFrame.from_store(self.client.candle_store, FIGI_USD, self.ema_states[FIGI_USD])
+            return usd_rates_data.get_xrate_dict_format()
+        # обновление хранилища свечей для валюты USD, возвращаются все сохраненные свечи
         try:
             usd_candles_data = self.client.get_usd_candles()
         except BadAuthException:
             return None
         # форматирование данных свечей
-        usd_rates_data = CandlesDataFrame(usd_candles_data)
+        usd_rates_data = CandlesDataFrame(usd_candles_data, self.ema_states[FIGI_USD])
         # форматирование результата в вид словаря
         return usd_rates_data.get_xrate_dict_format()
@@ -0,0 +1,104 @@
+import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, List, NamedTuple, Hashable
+
+
+class ChartSeries(NamedTuple):
+    """
+    ряды данных графика пары: время, курс и необязательная EMA
+    """
+    pair: str
+    times: List
+    values: List[float]
+    ema: Optional[List[Optional[float]]] = None
+
+    @property
+    def version(self) -> tuple:
+        """
+        версия данных: меняется при появлении новой точки или изменении последней
+        """
+        if not self.times:
+            return 0,
+        return len(self.times), self.times[-1], self.values[-1]
+
+
+def render_chart_png(series: ChartSeries, days: int) -> bytes:
+    """
+    функция построения PNG графика. выполняется в отдельном процессе, matplotlib импортируется в нем
+    :param series: -> ChartSeries ряды данных
+    :param days: -> int период графика в днях
+    :return: -> bytes изображение PNG
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(figsize=(8, 4), dpi=100)
+    try:
+        axes.plot(series.times, series.values, label=series.pair)
+        if series.ema:
+            axes.plot(series.times, [float('nan') if value is None else value for value in series.ema],
+                      label='EMA', linestyle='--')
+        axes.set_title(f'{series.pair}, {days} d')
+        axes.grid(True, alpha=0.3)
+        axes.legend()
+        figure.autofmt_xdate()
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(figure)
+
+
+class ChartRenderer:
+    """
+    класс построения графиков в пуле процессов. изображения кэшируются по ключу (пара, период, версия данных),
+    одновременные запросы одного графика получают общий результат
+    """
+
+    def __init__(self, max_workers: int = 1, cache_size: int = 32):
+        """
+        :param max_workers: -> int количество процессов построения графиков
+        :param cache_size: -> int количество хранимых изображений
+        """
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: 'OrderedDict[Hashable, Future]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # пул создается при первом графике. spawn не копирует потоки и блокировки процесса бота
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def render(self, series: ChartSeries, days: int) -> Future:
+        """
+        метод получения графика
+        :param series: -> ChartSeries ряды данных
+        :param days: -> int период графика в днях
+        :return: -> Future результат построения, для графика из кэша - уже завершенный
+        """
+        key = (series.pair, days, series.version)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._cache.move_to_end(key)
+                return future
+            future = self.executor.submit(render_chart_png, series, days)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return future
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
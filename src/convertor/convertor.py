@@ -1,62 +1,366 @@
+import asyncio
 import datetime
+import threading
 from datetime import timedelta
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Callable, Optional, ContextManager, NamedTuple, TYPE_CHECKING
 
 from src.config.configurator import ExchangeConvertorConfiguration
 from src.controllers.usd_contollers.bangkok_usd_thb_controller import LastUSDToTHBRates
-from src.controllers.const import RAIF_EX, SWIFT_RAIF, SWIFT_BKKB
+from src.controllers.const import RAIF_EX, SWIFT_RAIF, SWIFT_BKKB, BKK_USD_TIERS, USD_RUB, USD_THB, RUB_THB, \
+    RUB_THB_ZDV, CONVERSION_CURRENCIES
 from src.controllers.usd_contollers.tinkoff_usd_rub_controller import LastUSDToRUBRates
-from src.utils.calculation_utils import is_time_to_update
+from src.clients.const import FIGI_USD, CANDLES_HISTORY_DAYS
+from src.controllers.tink_controller import CandlesDataFrame
+from src.convertor.chart_renderer import ChartRenderer, ChartSeries
+from src.convertor.cross_rate import CrossRateEngine
+from src.convertor.refresh_scheduler import RefreshScheduler, RefreshJob, logger_convertor_logs
+from src.storage.quote_history import QuoteHistory
+from src.storage.rate_cache import RateCacheBackend, RateSnapshot, make_rate_cache
+from src.utils.calculation_utils import is_time_to_update, buy_rub_knowing_rub_bulk, buy_rub_knowing_thb_bulk
+from src.utils.lazy_import import lazy_module
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+np = lazy_module('numpy')
 
 
 class ValueRate:
     '''
     класс для обработки соотношения валюты с учетом всех комиссий
-    некоторые комиссии установлены по умолчанию
+    некоторые комиссии установлены по умолчанию.
+    курсы и комиссии передаются в граф кросс-курсов, RUB / THB определяется по лучшему маршруту графа
     '''
 
-    def __init__(self, usd_thb: float = 0, usd_rub: float = 0, raif_ex: float = RAIF_EX, swift :float = SWIFT_RAIF, thb_ex: float = SWIFT_BKKB):
+    def __init__(self, usd_thb: float = 0, usd_rub: float = 0, raif_ex: float = RAIF_EX, swift :float = SWIFT_RAIF, thb_ex: float = SWIFT_BKKB,
+                 engine: Optional[CrossRateEngine] = None):
         '''
         :param usd_thb: курс доллара к thb
         :param usd_rub: курс рубля к usd
         :param raif_ex: комиссия райфайзен банка броккера
         :param swift: комиссия за swift перевод
         :param thb_ex: комиссия приемы валюты
+        :param engine: граф кросс-курсов, в который можно добавить курсы других валют и поставщиков
         '''
         self.usd_thb = float(usd_thb)
         self.usd_rub = float(usd_rub)
         self.raif_ex = float(raif_ex)
         self.swift = float(swift)
         self.thb_ex = float(thb_ex)
+        # курсы поставщиков бота исключаются из арбитражного цикла последними
+        self.engine = engine if engine is not None else CrossRateEngine(
+            trusted_providers=('TINKOFF', 'BANGKOKBANK'))
+
+    def update_engine(self) -> CrossRateEngine:
+        '''
+        передача текущих курсов и комиссий в граф. матрица пересчитывается только при изменении значений
+        '''
+        self.engine.set_rate('RUB', 'USD', 1 / self.usd_rub if self.usd_rub else 0, fees=(self.raif_ex,),
+                             provider='TINKOFF')
+        self.engine.set_rate('USD', 'THB', self.usd_thb, fees=(self.swift, self.thb_ex), provider='BANGKOKBANK')
+        return self.engine
 
     @property
     def rub_thb(self) -> float:
         if self.usd_thb == 0 or self.usd_rub == 0:
             return 0
-        thb_rub = round(
-            self.usd_thb / self.usd_rub *
-            (1 - self.raif_ex / 100) *
-            (1 - self.swift / 100) *
-            (1 - self.thb_ex / 100),
-            2)
+        thb_rub = round(self.update_engine().rate('RUB', 'THB'), 2)
         return round(1 / thb_rub, 2)
 
     @property
     def rub_thb_zdv(self) -> float:
         return round(self.rub_thb * 1.02, 2)
 
+    @property
+    def rub_thb_rates(self) -> (float, float):
+        """
+        курс RUB / THB без учета и с учетом наценки, курс по графу определяется один раз
+        """
+        rub_thb = self.rub_thb
+        return rub_thb, round(rub_thb * 1.02, 2)
+
 
 class ValueData:
-    def __init__(self, rate: float = 0, message: str = ''):
+    """
+    класс кэша курса одного поставщика. обновление выполняется не более чем одним потоком одновременно,
+    остальные вызовы ожидают его результат и не обращаются к API повторно.
+    после истечения срока кэширования последний полученный курс отдается сразу с отметкой устаревания,
+    а повторный запрос выполняется в фоне. при ошибке поставщика сохраняется последний удачный курс
+    """
+
+    def __init__(self, rate: float = 0, message: str = '', retry_delay: float = 60, key: str = '',
+                 cache: Optional[RateCacheBackend] = None, lock_ttl: float = 60):
+        """
+        :param rate: -> float курс
+        :param message: -> str сообщение с данными курса
+        :param retry_delay: -> float задержка повторного запроса после ошибки поставщика в секундах
+        :param key: -> str ключ курса в общем кэше
+        :param cache: -> RateCacheBackend общий кэш курсов процессов, None - курс хранится только в процессе
+        :param lock_ttl: -> float время жизни блокировки обновления в общем кэше в секундах
+        """
+        # версия увеличивается при изменении значения курса или сообщения, изменения выполняются под _version_lock
+        self._version_lock = threading.Lock()
+        self.version = 0
         self.rate = rate
         self.message = message
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.key = key
+        self.cache = cache
+        self.lock_ttl = lock_ttl
+        # функция, вызываемая после каждого удачного запроса курса у поставщика
+        self.on_update: Optional[Callable[['ValueData'], None]] = None
+        self.last_error: Optional[Exception] = None
         self._time = datetime.datetime.now() - timedelta(days=1)
+        self._failed_time: Optional[datetime.datetime] = None
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate: float):
+        with self._version_lock:
+            # версия не меняется при повторной записи того же курса
+            if getattr(self, '_rate', None) != rate:
+                self._rate = rate
+                self.version += 1
+
+    @property
+    def message(self) -> str:
+        return self._message
+
+    @message.setter
+    def message(self, message: str):
+        with self._version_lock:
+            if getattr(self, '_message', None) != message:
+                self._message = message
+                self.version += 1
+
+    @property
+    def text_version(self) -> tuple:
+        """
+        версия текста курса: меняется при изменении курса и каждую минуту возраста устаревшего курса
+        """
+        return self.version, int(self.age.total_seconds() // 60) if self.is_stale else None
 
     @property
     def time_update(self) -> bool:
-        need_to_be_updated = is_time_to_update(self._time)
-        if need_to_be_updated:
-            self._time = datetime.datetime.now()
-        return need_to_be_updated
+        with self._lock:
+            need_to_be_updated = is_time_to_update(self._time)
+            if need_to_be_updated:
+                self._time = datetime.datetime.now()
+            return need_to_be_updated
+
+    @property
+    def is_expired(self) -> bool:
+        return is_time_to_update(self._time)
+
+    @property
+    def has_value(self) -> bool:
+        return bool(self.rate)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.has_value and self.is_expired
+
+    @property
+    def age(self) -> timedelta:
+        return datetime.datetime.now() - self._time
+
+    @property
+    def is_retry_pending(self) -> bool:
+        return self._failed_time is not None and datetime.datetime.now() - self._failed_time < self.retry_delay
+
+    @property
+    def text(self) -> str:
+        """
+        сообщение курса, устаревший курс отмечается временем последнего удачного обновления
+        """
+        if not self.is_stale:
+            return self.message
+        return f"(!) {int(self.age.total_seconds() // 60)} min old\n" + self.message
+
+    def sync(self):
+        """
+        метод получения курса из общего кэша, если другой процесс обновил его позже
+        """
+        if self.cache is None:
+            return
+        snapshot = self.cache.get(self.key)
+        if snapshot is not None and snapshot.time > self._time.timestamp():
+            self.rate, self.message = snapshot.rate, snapshot.message
+            self._time = datetime.datetime.fromtimestamp(snapshot.time)
+
+    def _shared_lock(self) -> ContextManager:
+        if self.cache is None:
+            return nullcontext(True)
+        return self.cache.lock(self.key, ttl=self.lock_ttl, timeout=self.lock_ttl)
+
+    def _update(self, fetch: Callable[[], Optional[tuple]], force: bool = True):
+        requested = datetime.datetime.now()
+        # курс поставщика обновляет только один процесс, остальные получают его результат из общего кэша
+        with self._shared_lock() as acquired:
+            self.sync()
+            if not acquired:
+                # блокировку держит другой процесс дольше lock_ttl: запрос не дублируется, остается курс из кэша
+                logger_convertor_logs.warning('RATES UPDATE LOCK FOR %s IS BUSY, CACHED RATE IS KEPT', self.key)
+                return
+            if self._time >= requested or (not force and not self.is_expired):
+                return
+            self._fetch(fetch)
+
+    def _fetch(self, fetch: Callable[[], Optional[tuple]]):
+        try:
+            rates = fetch()
+            if rates is None or rates[0] is None:
+                raise ValueError('RATES ARE UNAVAILABLE')
+        except Exception as e:
+            self.last_error, self._failed_time = e, datetime.datetime.now()
+            logger_convertor_logs.error('RATES UPDATE FAILED, LAST RATE IS KEPT: %r', e)
+            raise
+        self.rate, self.message = rates
+        self._time, self.last_error, self._failed_time = datetime.datetime.now(), None, None
+        if self.cache is not None:
+            self.cache.set(self.key, RateSnapshot(self.rate, self.message, self._time.timestamp()))
+        if self.on_update is not None:
+            try:
+                self.on_update(self)
+            except Exception as e:
+                logger_convertor_logs.error('RATES UPDATE HANDLER FAILED: %r', e)
+
+    def update(self, fetch: Callable[[], Optional[tuple]]) -> 'ValueData':
+        """
+        метод обязательного обновления курса. при ошибке поставщика сохраняется последний курс, ошибка пробрасывается
+        :param fetch: -> Callable функция получения курса и сообщения поставщика
+        :return: -> ValueData кэш курса
+        """
+        with self._lock:
+            self._update(fetch)
+        return self
+
+    def refresh(self, fetch: Callable[[], Optional[tuple]], force: bool = False) -> 'ValueData':
+        """
+        метод обновления курса с единственным одновременным запросом.
+        устаревший курс отдается сразу, запрос выполняется в фоне. ошибки поставщика не пробрасываются
+        :param fetch: -> Callable функция получения курса и сообщения поставщика
+        :param force: -> bool обновить курс независимо от времени последнего обновления
+        :return: -> ValueData кэш курса
+        """
+        self.sync()
+        if not force and not self.is_expired:
+            return self
+        if not force and self.has_value:
+            self.revalidate_in_background(fetch)
+            return self
+        with self._lock:
+            # пока ожидали блокировку, курс мог обновить другой поток
+            if (force or self.is_expired) and not self.is_retry_pending:
+                try:
+                    self._update(fetch, force)
+                except Exception:
+                    pass
+        return self
+
+    def revalidate_in_background(self, fetch: Callable[[], Optional[tuple]]) -> bool:
+        """
+        метод фонового обновления курса. новый запрос не запускается, если обновление уже выполняется
+        или после ошибки поставщика не прошла задержка retry_delay
+        :param fetch: -> Callable функция получения курса и сообщения поставщика
+        :return: -> bool запущено ли фоновое обновление
+        """
+        if self.is_retry_pending or not self._lock.acquire(blocking=False):
+            return False
+
+        def revalidate():
+            try:
+                self._update(fetch, force=False)
+            except Exception:
+                pass
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=revalidate, name='rates-revalidate', daemon=True).start()
+        return True
+
+    async def refresh_async(self, fetch: Callable[[], Optional[tuple]], force: bool = False) -> 'ValueData':
+        """
+        вариант refresh для цикла событий asyncio. запрос выполняется в пуле потоков под той же блокировкой,
+        поэтому корутины и потоки разделяют одно обновление и цикл событий не блокируется
+        :param fetch: -> Callable функция получения курса и сообщения поставщика
+        :param force: -> bool обновить курс независимо от времени последнего обновления
+        :return: -> ValueData кэш курса
+        """
+        self.sync()
+        if not force and not self.is_expired:
+            return self
+        if not force and self.has_value:
+            self.revalidate_in_background(fetch)
+            return self
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.refresh, fetch, force)
+
+
+class ConversionSnapshot(NamedTuple):
+    """
+    снимок курсов для пакетной конвертации: курсы поставщиков и курс RUB / THB с учетом комиссии
+    для каждого семейства USD. thresholds - минимальные суммы семейств в USD по возрастанию
+    """
+    usd_rub: float
+    usd_thb: float
+    thresholds: 'ndarray'
+    rates: 'ndarray'
+
+    @staticmethod
+    def normalize_currency(currency) -> 'ndarray':
+        """
+        метод приведения валюты сумм к виду RUB / THB: без пробелов, в верхнем регистре
+        :param currency: валюта сумм, строка или массив
+        :return: -> numpy.ndarray валюты сумм
+        """
+        return np.char.upper(np.char.strip(np.asarray(currency, dtype=str)))
+
+    @classmethod
+    def is_thb(cls, currency) -> 'ndarray':
+        """
+        метод проверки валюты сумм. валюта, отличная от RUB и THB, не считается рублями
+        :param currency: валюта сумм RUB или THB, строка или массив
+        :return: -> numpy.ndarray признак суммы в THB
+        """
+        currency = cls.normalize_currency(currency)
+        unknown = ~np.isin(currency, CONVERSION_CURRENCIES)
+        if unknown.any():
+            raise ValueError(f'UNKNOWN CURRENCY: {sorted(set(currency[unknown].ravel().tolist()))}')
+        return currency == 'THB'
+
+    def rates_for(self, amounts, currency='RUB') -> 'ndarray':
+        """
+        метод определения курса RUB / THB для каждой суммы по семейству USD
+        :param amounts: массив сумм
+        :param currency: валюта сумм RUB или THB, строка или массив той же формы
+        :return: -> numpy.ndarray курсы
+        """
+        return self._rates_for(np.asarray(amounts, dtype=np.float64), self.is_thb(currency))
+
+    def _rates_for(self, amounts: 'ndarray', is_thb: 'ndarray') -> 'ndarray':
+        usd_amounts = np.where(is_thb, amounts / self.usd_thb, amounts / self.usd_rub)
+        tiers = np.clip(np.searchsorted(self.thresholds, usd_amounts, side='right') - 1, 0, None)
+        return self.rates[tiers]
+
+    def convert(self, amounts, currency='RUB') -> 'ndarray':
+        """
+        метод пакетной конвертации: суммы в RUB переводятся в THB, суммы в THB - в RUB
+        :param amounts: массив сумм
+        :param currency: валюта сумм RUB или THB, строка или массив той же формы
+        :return: -> numpy.ndarray суммы после конвертации с округлением до 2 знаков, ValueError - неизвестная валюта
+        """
+        amounts, is_thb = np.asarray(amounts, dtype=np.float64), self.is_thb(currency)
+        rates = self._rates_for(amounts, is_thb)
+        return np.where(is_thb,
+                        buy_rub_knowing_thb_bulk(amounts, rates),
+                        buy_rub_knowing_rub_bulk(amounts, rates))
 
 
 class ExchangeConvertor:
@@ -68,12 +372,39 @@ class ExchangeConvertor:
         """
         метод инициализации, в котором определяем текущие котировки валют
         """
-        self.thb_rates = ValueData()
-        self.tink_rates = ValueData()
-        self.money = ValueRate()
         self.conf = conf
+        # снимки курсов общие для всех процессов приложения при кэше sqlite
+        self.rate_cache = make_rate_cache(self.conf.rate_cache, self.conf.rate_cache_path)
+        self.thb_rates = ValueData(retry_delay=self.conf.refresh_retry_delay, key=USD_THB, cache=self.rate_cache)
+        self.tink_rates = ValueData(retry_delay=self.conf.refresh_retry_delay, key=USD_RUB, cache=self.rate_cache)
+        self.money = ValueRate()
         self.tinkoff = LastUSDToRUBRates(conf.tinkoff)
         self.bkkbbank = LastUSDToTHBRates(conf.bkkbbank)
+        self.scheduler = RefreshScheduler()
+        # подготовленные ответы: название -> (версия курсов, ответ)
+        self._rendered = dict()
+        # история котировок дописывается после каждого обновления курса у поставщика
+        self.quote_history = QuoteHistory(self.conf.quote_history_path, self.conf.quote_history_interval,
+                                          self.conf.quote_history_days)
+        self.tink_rates.on_update = self.record_quotes
+        self.thb_rates.on_update = self.record_quotes
+        self.charts = ChartRenderer(self.conf.chart_workers)
+
+    def start_refresh_ahead(self):
+        """
+        метод запуска фонового обновления курсов каждого поставщика до истечения срока кэширования.
+        запросы пользователей после этого читают уже обновленные данные
+        """
+        self.scheduler.add_job(RefreshJob(
+            'TINKOFF', lambda: self.tink_rates.update(self.tinkoff.get_usd_last_rate),
+            self.conf.tinkoff.refresh_interval, self.conf.refresh_jitter, self.conf.refresh_retry_delay))
+        self.scheduler.add_job(RefreshJob(
+            'BANGKOKBANK', lambda: self.thb_rates.update(self.bkkbbank.get_usd_to_thb_rates),
+            self.conf.bkkbbank.refresh_interval, self.conf.refresh_jitter, self.conf.refresh_retry_delay))
+        self.scheduler.start()
+
+    def stop_refresh_ahead(self):
+        self.scheduler.stop()
 
     def get_usd_rub_data(self) -> ValueData:
         """
@@ -82,9 +413,8 @@ class ExchangeConvertor:
         :return: flaot(),str()
         """
 
-        if self.tink_rates.time_update:
-            self.tink_rates.rate, self.tink_rates.message = self.tinkoff.get_usd_last_rate()
-            return self.tink_rates
+        # в режиме потока данные берутся из памяти при каждом запросе без обращения к API
+        return self.tink_rates.refresh(self.tinkoff.get_usd_last_rate, force=self.tinkoff.streaming)
 
     def get_usd_thb_data(self) -> ValueData:
         """
@@ -92,9 +422,7 @@ class ExchangeConvertor:
         И получение текстового сообщения о дополнительной информации
         :return: ValueData
         """
-        if self.thb_rates.time_update:
-            self.thb_rates.rate, self.thb_rates.message = self.bkkbbank.get_usd_to_thb_rates()
-        return self.thb_rates
+        return self.thb_rates.refresh(self.bkkbbank.get_usd_to_thb_rates)
 
     def get_thb_rub_rate(self) -> (float, str):
         """
@@ -102,19 +430,166 @@ class ExchangeConvertor:
         и перезаписи основных переменных
         :return: flaot(),str()
         """
+        self.update_money()
+        return self.money.rub_thb_rates
+
+    def update_money(self):
+        """
+        метод перезаписи курсов поставщиков в основном объекте расчета обмена
+        """
         self.money.usd_thb = self.thb_rates.rate
         self.money.usd_rub = self.tink_rates.rate
-        return self.money.rub_thb, self.money.rub_thb_zdv
 
-    def get_exchange_message_rub_thb(self) -> (float, str):
+    def get_rub_thb_rate_by_amount(self, amount: float, currency: str = 'RUB') -> (float, float):
+        """
+        метод определения курса обмена RUB в THB с учетом семейства USD, действующего для суммы обмена.
+        используются закэшированные курсы, запросы к API не выполняются
+        :param amount: -> float сумма обмена
+        :param currency: -> str валюта суммы RUB или THB
+        :return: -> float(), float() значение курса без учета и с учетом комиссии
+        """
+        usd_rate = self.thb_rates.rate if currency == 'THB' else self.tink_rates.rate
+        usd_amount = amount / usd_rate if usd_rate else 0
+        tier_rates = self.bkkbbank.get_tier_rate(usd_amount)
+        usd_thb = tier_rates[0] if tier_rates is not None else self.thb_rates.rate
+        money = ValueRate(usd_thb=usd_thb, usd_rub=self.tink_rates.rate, raif_ex=self.money.raif_ex,
+                          swift=self.money.swift, thb_ex=self.money.thb_ex)
+        return money.rub_thb, money.rub_thb_zdv
+
+    def conversion_snapshot(self) -> ConversionSnapshot:
+        """
+        метод получения снимка текущих курсов для пакетной конвертации
+        :return: -> ConversionSnapshot снимок курсов
+        """
         self.get_usd_thb_data()
         self.get_usd_rub_data()
-        self.get_thb_rub_rate()
+        if not self.thb_rates.rate or not self.tink_rates.rate:
+            raise ValueError('RATES ARE UNAVAILABLE')
+        thresholds, rates = [], []
+        for min_amount, family in sorted(BKK_USD_TIERS):
+            tier_rates = self.bkkbbank.tier_rates.get(family)
+            usd_thb = tier_rates[0] if tier_rates is not None else self.thb_rates.rate
+            money = ValueRate(usd_thb=usd_thb, usd_rub=self.tink_rates.rate, raif_ex=self.money.raif_ex,
+                              swift=self.money.swift, thb_ex=self.money.thb_ex)
+            thresholds.append(min_amount)
+            rates.append(money.rub_thb_zdv)
+        return ConversionSnapshot(self.tink_rates.rate, self.thb_rates.rate,
+                                  np.asarray(thresholds, dtype=np.float64), np.asarray(rates, dtype=np.float64))
+
+    def record_quotes(self, value_data: Optional[ValueData] = None):
+        """
+        метод сохранения текущих котировок в историю: USD / RUB, USD / THB и RUB / THB без учета и с учетом наценки
+        :param value_data: -> ValueData обновленный курс поставщика
+        """
+        # все котировки записи отмечаются временем обновления курса поставщика
+        quote_time = value_data._time if value_data is not None else max(self.tink_rates._time, self.thb_rates._time)
+        quotes = []
+        for pair, rates in ((USD_RUB, self.tink_rates), (USD_THB, self.thb_rates)):
+            if rates.rate and (value_data is None or rates is value_data):
+                quotes.append((pair, quote_time, rates.rate))
+        if self.tink_rates.rate and self.thb_rates.rate:
+            money = ValueRate(usd_thb=self.thb_rates.rate, usd_rub=self.tink_rates.rate, raif_ex=self.money.raif_ex,
+                              swift=self.money.swift, thb_ex=self.money.thb_ex)
+            rub_thb, rub_thb_zdv = money.rub_thb_rates
+            quotes += [(RUB_THB, quote_time, rub_thb), (RUB_THB_ZDV, quote_time, rub_thb_zdv)]
+        self.quote_history.append_many(quotes)
+
+    def get_history_message(self, pair: str = RUB_THB, days: int = 7) -> str:
+        """
+        метод формирования сообщения истории котировок пары: последняя котировка каждого дня периода.
+        история читается из локального хранилища без запросов к API
+        :param pair: -> str пара из QUOTE_PAIRS
+        :param days: -> int количество дней
+        :return: -> str сообщение
+        """
+        start = datetime.datetime.combine(datetime.date.today() - timedelta(days=days - 1), datetime.time())
+        daily = dict()
+        for time, rate in self.quote_history.range(pair, start):
+            # котировки группируются по местной дате
+            daily[time.astimezone().date()] = rate
+        if not daily:
+            return f"{pair}: no history for {days} days\n"
+        lines = [f"{day.strftime('%d/%m/%Y')}  {rate}" for day, rate in daily.items()]
+        return f"{pair}\n" + "\n".join(lines) + "\n"
+
+    def get_chart_series(self, pair: str = RUB_THB, days: int = 3) -> Optional[ChartSeries]:
+        """
+        метод получения рядов данных графика без запросов к API. для USD / RUB за период хранения свечей
+        используются часовые свечи с EMA, для остальных пар и периодов - история котировок.
+        время рядов данных в UTC
+        :param pair: -> str пара из QUOTE_PAIRS
+        :param days: -> int период в днях
+        :return: -> ChartSeries ряды данных или None, если данных нет
+        """
+        start = datetime.datetime.now(datetime.timezone.utc) - timedelta(days=days)
+        if pair == USD_RUB and days <= CANDLES_HISTORY_DAYS:
+            candles = CandlesDataFrame.from_store(self.tinkoff.client.candle_store, FIGI_USD)
+            series = candles.get_chart_series(start)
+            if series is not None:
+                return ChartSeries(pair, *series)
+        quotes = self.quote_history.range(pair, start)
+        if not quotes:
+            return None
+        times, values = zip(*quotes)
+        return ChartSeries(pair, list(times), list(values))
+
+    def get_chart(self, pair: str = RUB_THB, days: int = 3) -> Optional[Future]:
+        """
+        метод получения PNG графика пары. график строится в пуле процессов и кэшируется по версии данных
+        :param pair: -> str пара из QUOTE_PAIRS
+        :param days: -> int период в днях
+        :return: -> Future результат с изображением PNG или None, если данных нет
+        """
+        series = self.get_chart_series(pair, days)
+        if series is None:
+            return None
+        return self.charts.render(series, days)
+
+    @property
+    def rates_version(self) -> tuple:
+        """
+        версия снимка курсов, по которой кэшируются подготовленные сообщения
+        """
+        return self.tink_rates.text_version, self.thb_rates.text_version, id(self.money), self.money.raif_ex, \
+            self.money.swift, self.money.thb_ex
+
+    def render(self, name: str, build: Callable[[], object]):
+        """
+        метод получения подготовленного ответа. ответ формируется один раз для версии снимка курсов
+        :param name: -> str название ответа
+        :param build: -> Callable функция формирования ответа
+        :return: ответ для текущей версии курсов
+        """
+        version = self.rates_version
+        cached = self._rendered.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rendered = build()
+        self._rendered[name] = (version, rendered)
+        return rendered
+
+    def _build_exchange_message_rub_thb(self) -> (float, str):
+        rub_thb, rub_thb_zdv = self.get_thb_rub_rate()
+        message_out = f"RUB / THB   : {rub_thb}\n" \
+                      f"RUB / THB*  : {rub_thb_zdv}" \
+                      f"\n"
+        return rub_thb_zdv, message_out
+
+    def get_exchange_message_rub_thb(self) -> (float, str):
         """
         метод определяющий финальное сообщение значения обмена 1 THB к RUB
         :return: -> float() , str() значение курса, строку с дополнительной информацией
         """
-        message_out = f"RUB / THB   : {self.money.rub_thb}\n" \
-                      f"RUB / THB*  : {self.money.rub_thb_zdv}" \
-                      f"\n"
-        return self.money.rub_thb_zdv, message_out
\ No newline at end of file
+        self.get_usd_thb_data()
+        self.get_usd_rub_data()
+        # курсы основного объекта обновляются и тогда, когда сообщение берется из кэша
+        self.update_money()
+        return self.render('exchange_message_rub_thb', self._build_exchange_message_rub_thb)
+
+    def get_info_message(self) -> str:
+        """
+        метод формирования сообщения со всеми курсами и курсом обмена RUB в THB
+        :return: -> str сообщение
+        """
+        rate, message_out = self.get_exchange_message_rub_thb()
+        return self.render('info', lambda: self.tink_rates.text + self.thb_rates.text + message_out)
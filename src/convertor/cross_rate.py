@@ -0,0 +1,226 @@
+import math
+import threading
+from typing import Optional, Dict, List, NamedTuple, Tuple, Iterable
+
+from src.utils.lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
+
+class RateEdge(NamedTuple):
+    """
+    ребро графа курсов: обмен 1 единицы исходной валюты на rate единиц целевой с цепочкой комиссий в процентах
+    """
+    source: str
+    target: str
+    rate: float
+    fees: Tuple[float, ...] = ()
+    provider: str = ''
+
+    @property
+    def multiplier(self) -> float:
+        multiplier = self.rate
+        for fee in self.fees:
+            multiplier *= 1 - fee / 100
+        return multiplier
+
+
+class CrossRateEngine:
+    """
+    класс расчета кросс-курсов для произвольного набора валют.
+    курсы поставщиков с цепочками комиссий хранятся как взвешенный граф (вес ребра -log эффективного курса),
+    при изменении любого курса матрица лучших кросс-курсов пересчитывается алгоритмом Флойда-Уоршелла
+    векторизованно средствами numpy. запрос курса и маршрута для пары валют читает готовую матрицу.
+    при появлении арбитражного цикла (отрицательного цикла графа) из расчета исключается курс цикла
+    от недоверенного поставщика, а среди курсов одного уровня доверия - давнее всех обновленный
+    """
+
+    def __init__(self, edges: Iterable[RateEdge] = (), trusted_providers: Iterable[str] = ()):
+        """
+        :param edges: -> Iterable начальные курсы поставщиков
+        :param trusted_providers: -> Iterable поставщики, курсы которых исключаются из арбитражного цикла последними
+        """
+        self.trusted_providers = frozenset(trusted_providers)
+        self._edges: Dict[Tuple[str, str, str], RateEdge] = dict()
+        # номер последнего изменения каждого курса, меньший номер - более давнее обновление
+        self._updated: Dict[Tuple[str, str, str], int] = dict()
+        self._sequence = 0
+        self._index: Dict[str, int] = dict()
+        # матрицы и индекс валют последнего пересчета, читаются только вместе под блокировкой
+        self._dist_index: Dict[str, int] = dict()
+        self._dist = None
+        self._next = None
+        self._edge_id = None
+        self._edge_list: List[RateEdge] = []
+        self._arbitrage: List[RateEdge] = []
+        self._dirty = True
+        self._lock = threading.Lock()
+        for edge in edges:
+            self.set_edge(edge)
+
+    @property
+    def currencies(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    @property
+    def arbitrage(self) -> List[RateEdge]:
+        """
+        ребра арбитражных циклов, исключенные из расчета кросс-курсов при последнем пересчете
+        """
+        return list(self._matrix()[5])
+
+    def set_rate(self, source: str, target: str, rate: float, fees: Iterable[float] = (), provider: str = ''):
+        """
+        метод добавления или изменения курса поставщика
+        :param source: -> str исходная валюта
+        :param target: -> str целевая валюта
+        :param rate: -> float количество целевой валюты за 1 единицу исходной
+        :param fees: -> Iterable комиссии обмена в процентах
+        :param provider: -> str поставщик курса, курсы разных поставщиков одной пары хранятся отдельно
+        """
+        self.set_edge(RateEdge(source, target, float(rate), tuple(float(fee) for fee in fees), provider))
+
+    def set_edge(self, edge: RateEdge):
+        with self._lock:
+            key = (edge.source, edge.target, edge.provider)
+            if self._edges.get(key) == edge:
+                return
+            self._sequence += 1
+            self._updated[key] = self._sequence
+            if edge.rate > 0:
+                self._edges[key] = edge
+            else:
+                # нулевой курс означает отсутствие котировки поставщика
+                self._edges.pop(key, None)
+            for currency in (edge.source, edge.target):
+                self._index.setdefault(currency, len(self._index))
+            self._dirty = True
+
+    def _shortest_paths(self, edges: List[RateEdge]) -> tuple:
+        size = len(self._index)
+        dist = np.full((size, size), np.inf)
+        np.fill_diagonal(dist, 0.0)
+        edge_id = np.full((size, size), -1, dtype=np.int64)
+        for position, edge in enumerate(edges):
+            i, j = self._index[edge.source], self._index[edge.target]
+            weight = -math.log(edge.multiplier)
+            if weight < dist[i, j]:
+                dist[i, j], edge_id[i, j] = weight, position
+        # next_hop[i, j] - следующая валюта на лучшем маршруте из i в j
+        next_hop = np.where(np.isfinite(dist), np.arange(size)[None, :], -1)
+        for k in range(size):
+            through_k = dist[:, k, None] + dist[None, k, :]
+            better = through_k < dist - 1e-12
+            dist = np.where(better, through_k, dist)
+            next_hop = np.where(better, next_hop[:, k, None], next_hop)
+        return dist, next_hop, edge_id
+
+    def _recompute(self):
+        edges = [edge for edge in self._edges.values() if edge.multiplier > 0]
+        arbitrage = []
+        while True:
+            dist, next_hop, edge_id = self._shortest_paths(edges)
+            cycle = self._negative_cycle(edges, dist, next_hop, edge_id)
+            if not cycle:
+                break
+            # исключается курс недоверенного поставщика, затем давнее всех обновленный, и матрица пересчитывается
+            excluded = min(cycle, key=lambda edge: (edge.provider in self.trusted_providers,
+                                                    self._updated[(edge.source, edge.target, edge.provider)]))
+            arbitrage.append(excluded)
+            edges = [edge for edge in edges if edge is not excluded]
+        self._dist_index = dict(self._index)
+        self._dist, self._next, self._edge_id, self._edge_list = dist, next_hop, edge_id, edges
+        self._arbitrage = arbitrage
+        self._dirty = False
+
+    def _negative_cycle(self, edges: List[RateEdge], dist, next_hop, edge_id) -> List[RateEdge]:
+        """
+        метод поиска ребер отрицательного цикла. от валюты с отрицательным путем к самой себе проходим по next_hop
+        до повторения валюты, найденный цикл проверяется по весам ребер
+        :return: -> list ребра цикла, пустой список - отрицательных циклов нет
+        """
+        for start in np.flatnonzero(np.diag(dist) < -1e-12):
+            position, visited = int(start), []
+            while position not in visited:
+                visited.append(position)
+                position = int(next_hop[position, start])
+            nodes = visited[visited.index(position):] + [position]
+            cycle = [edges[edge_id[source, target]] for source, target in zip(nodes, nodes[1:])]
+            if sum(-math.log(edge.multiplier) for edge in cycle) < -1e-12:
+                return cycle
+        return self._bellman_ford_cycle(edges)
+
+    def _bellman_ford_cycle(self, edges: List[RateEdge]) -> List[RateEdge]:
+        """
+        метод поиска отрицательного цикла алгоритмом Беллмана-Форда, если проход по next_hop цикл не нашел
+        :return: -> list ребра цикла, пустой список - отрицательных циклов нет
+        """
+        size = len(self._index)
+        dist, previous = [0.0] * size, [None] * size
+        for _ in range(size):
+            changed = None
+            for edge in edges:
+                i, j = self._index[edge.source], self._index[edge.target]
+                weight = dist[i] - math.log(edge.multiplier)
+                if weight < dist[j] - 1e-12:
+                    dist[j], previous[j], changed = weight, edge, j
+            if changed is None:
+                return []
+        # после size переходов по предыдущим ребрам валюта гарантированно лежит на цикле
+        for _ in range(size):
+            changed = self._index[previous[changed].source]
+        cycle, position = [], changed
+        while True:
+            edge = previous[position]
+            cycle.append(edge)
+            position = self._index[edge.source]
+            if position == changed:
+                return cycle[::-1]
+
+    def _matrix(self) -> tuple:
+        with self._lock:
+            if self._dirty:
+                self._recompute()
+            return self._dist_index, self._dist, self._next, self._edge_id, self._edge_list, self._arbitrage
+
+    def rate(self, source: str, target: str) -> float:
+        """
+        метод получения лучшего эффективного курса с учетом комиссий
+        :param source: -> str исходная валюта
+        :param target: -> str целевая валюта
+        :return: -> float количество целевой валюты за 1 единицу исходной, 0 - маршрута нет
+        """
+        index, dist = self._matrix()[:2]
+        if source not in index or target not in index:
+            return 0
+        weight = dist[index[source], index[target]]
+        return math.exp(-weight) if np.isfinite(weight) else 0
+
+    def route(self, source: str, target: str) -> Optional[List[RateEdge]]:
+        """
+        метод получения лучшего маршрута обмена
+        :param source: -> str исходная валюта
+        :param target: -> str целевая валюта
+        :return: -> list ребра маршрута по порядку обмена, None - маршрута нет
+        """
+        index, dist, next_hop, edge_id, edges = self._matrix()[:5]
+        if source not in index or target not in index:
+            return None
+        i, j = index[source], index[target]
+        if not np.isfinite(dist[i, j]):
+            return None
+        route = []
+        while i != j and len(route) < len(index):
+            hop = int(next_hop[i, j])
+            route.append(edges[edge_id[i, hop]])
+            i = hop
+        return route
+
+    def matrix(self) -> Tuple[List[str], 'np.ndarray']:
+        """
+        метод получения матрицы всех кросс-курсов
+        :return: -> tuple список валют и матрица курсов (строка - исходная валюта, столбец - целевая)
+        """
+        index, dist = self._matrix()[:2]
+        return list(index), np.exp(-dist)
@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.config.configurator import ConvertorLogerConfiguration
+from src.logger.logger import Zlogger
+
+conf = ConvertorLogerConfiguration()
+logger_convertor_logs = Zlogger(conf)
+
+
+class RefreshJob:
+    """
+    задача фонового обновления данных одного поставщика
+    """
+
+    def __init__(self, name: str, refresh: Callable[[], object], interval: float, jitter: float = 0,
+                 retry_delay: Optional[float] = None):
+        """
+        :param name: -> str название поставщика
+        :param refresh: -> Callable функция обновления данных
+        :param interval: -> float период обновления в секундах
+        :param jitter: -> float случайное смещение периода в секундах, чтобы обновления не совпадали по времени
+        :param retry_delay: -> float задержка повтора после ошибки в секундах, по умолчанию равна периоду
+        """
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = interval if retry_delay is None else retry_delay
+        self.next_run = time.monotonic()
+
+    def schedule(self, succeeded: bool = True):
+        if not succeeded:
+            self.next_run = time.monotonic() + self.retry_delay
+            return
+        # смещение только уменьшает период, данные обновляются до истечения срока кэширования
+        self.next_run = time.monotonic() + max(self.interval - random.uniform(0, self.jitter), 0)
+
+
+class RefreshScheduler:
+    """
+    класс фонового обновления данных поставщиков до истечения срока их кэширования.
+    все задачи выполняются в одном фоновом потоке, первое обновление выполняется сразу после запуска
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, RefreshJob] = dict()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_job(self, job: RefreshJob):
+        self.jobs[job.name] = job
+        self._wakeup.set()
+
+    def start(self):
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rates-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_pending(self):
+        """
+        метод выполнения задач, время обновления которых наступило
+        """
+        now = time.monotonic()
+        for job in list(self.jobs.values()):
+            if self._stop.is_set():
+                return
+            if job.next_run > now:
+                continue
+            try:
+                job.refresh()
+            except Exception as e:
+                logger_convertor_logs.error('REFRESH OF %s FAILED: %r', job.name, e)
+                job.schedule(succeeded=False)
+            else:
+                logger_convertor_logs.debug('%s HAS BEEN REFRESHED', job.name)
+                job.schedule()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            if not self.jobs:
+                delay = None
+            else:
+                delay = max(min(job.next_run for job in self.jobs.values()) - time.monotonic(), 0)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
@@ -1,9 +1,10 @@
+import io
 import re
 
 import telebot
-from flask import Flask, request
 
 from src.config.configurator import HerokuConfiguration, AppConfiguration
+from src.controllers.const import RUB_THB, QUOTE_PAIRS, HISTORY_MAX_DAYS
 from src.convertor.convertor import ExchangeConvertor
 from src.utils.calculation_utils import buy_rub_knowing_rub, buy_rub_knowing_thb
 
@@ -36,47 +37,87 @@ class TelegramBotClient:
         def _send_commission_only(message):
             self.send_commission_only(message)
 
+        @self.bot.message_handler(commands=['history'])
+        def _send_history(message):
+            self.send_history(message)
+
+        @self.bot.message_handler(commands=['chart'])
+        def _send_chart(message):
+            self.send_chart(message)
+
         @self.bot.message_handler(commands=['ex', 'exchange', 'money'])
         def _handle_rate_message(message):
             self.bot.send_message(message.from_user.id, f'!!!!!!Enter yor rate or skip!!!!!!!')
             self.bot.register_next_step_handler(message, self.handle_message)
 
     def send_all_info(self, message):
-        rate, message_out = self.bot_bank_connect.get_exchange_message_rub_thb()
-        self.bot.send_message(message.from_user.id,
-                              self.bot_bank_connect.tink_rates.message +
-                              self.bot_bank_connect.thb_rates.message +
-                              message_out)
+        self.bot.send_message(message.from_user.id, self.bot_bank_connect.get_info_message())
 
     def send_test_message(self, message):
         self.bot.send_message(message.from_user.id, 'test_response')
 
     def send_usd_rate(self, message):
         self.bot_bank_connect.get_usd_rub_data()
-        usd_rate, message_in = self.bot_bank_connect.tink_rates.rate, self.bot_bank_connect.tink_rates.message
+        usd_rate, message_in = self.bot_bank_connect.tink_rates.rate, self.bot_bank_connect.tink_rates.text
         self.bot.send_message(message.from_user.id, message_in)
 
     def send_thb_rate(self, message):
         self.bot_bank_connect.get_usd_thb_data()
-        thb_rate, message_in = self.bot_bank_connect.thb_rates.rate, self.bot_bank_connect.thb_rates.message
+        thb_rate, message_in = self.bot_bank_connect.thb_rates.rate, self.bot_bank_connect.thb_rates.text
         self.bot.send_message(message.from_user.id, message_in)
 
     def send_commission_only(self, message):
         rate, message_in_out = self.bot_bank_connect.get_exchange_message_rub_thb()
         self.bot.send_message(message.from_user.id, message_in_out)
 
+    def send_history(self, message):
+        # /history [USD_RUB|USD_THB|RUB_THB|RUB_THB_ZDV] [дней]
+        pair, days = RUB_THB, 7
+        for argument in message.text.split()[1:]:
+            if argument.isdigit():
+                days = max(1, min(int(argument), HISTORY_MAX_DAYS))
+            elif argument.upper() in QUOTE_PAIRS:
+                pair = argument.upper()
+        self.bot.send_message(message.from_user.id, self.bot_bank_connect.get_history_message(pair, days))
+
+    def send_chart(self, message):
+        # /chart [USD_RUB|USD_THB|RUB_THB|RUB_THB_ZDV] [дней]
+        pair, days = RUB_THB, 3
+        for argument in message.text.split()[1:]:
+            if argument.isdigit():
+                days = max(1, min(int(argument), HISTORY_MAX_DAYS))
+            elif argument.upper() in QUOTE_PAIRS:
+                pair = argument.upper()
+        chart = self.bot_bank_connect.get_chart(pair, days)
+        if chart is None:
+            self.bot.send_message(message.from_user.id, f'{pair}: no history for {days} days')
+            return
+        # изображение отправляется по готовности, обработчик сообщений не ждет построения графика
+        chart.add_done_callback(lambda future: self.send_chart_photo(message, pair, future))
+
+    def send_chart_photo(self, message, pair, future):
+        try:
+            png = future.result()
+        except Exception:
+            self.bot.send_message(message.from_user.id, f'{pair}: chart is unavailable')
+            return
+        self.bot.send_photo(message.from_user.id, io.BytesIO(png))
+
     def handle_rate_message(self, message):
         self.bot.send_message(message.from_user.id, f'!!!!!!Enter yor rate or skip!!!!!!!')
         self.bot.register_next_step_handler(message, self.handle_message)
 
     def handle_message(self, message):
-        global rate
+        global rate, rate_by_amount
         try:
             value_rate = message.text.upper()
             value_rate = re.search(r"\d+\.?\d*", value_rate)
             rate = float(value_rate.group(0))
+            rate_by_amount = False
         except:
             rate, message_out = self.bot_bank_connect.get_exchange_message_rub_thb()
+            # курс банка уточняется по семейству USD для каждой введенной суммы
+            rate_by_amount = True
         self.bot.send_message(message.from_user.id, f'Ready to convert with rate {rate}\n'
                                                     f'Enter amount of money with THB to RUB in the end')
         self.bot.register_next_step_handler(message, self.get_money_value)
@@ -99,25 +140,39 @@ class TelegramBotClient:
         name_money = input_value.group('name')
 
         value_money = 0 if value_money is None else int(value_money)
+        value_rate = rate
+        if rate_by_amount:
+            _, value_rate = self.bot_bank_connect.get_rub_thb_rate_by_amount(value_money, name_money or 'RUB')
+            value_rate = value_rate or rate
 
         if name_money == 'RUB' or name_money == '':
             message_out = f"I will convert RUB to THB\n" \
-                          f"{value_money}RUB = {buy_rub_knowing_rub(value=value_money, rate=rate)}THB"
+                          f"{value_money}RUB = {buy_rub_knowing_rub(value=value_money, rate=value_rate)}THB"
         else:
             message_out = f"I will convert THB to RUB\n" \
-                          f"{value_money}THB = {buy_rub_knowing_thb(value=value_money, rate=rate)}RUB"
+                          f"{value_money}THB = {buy_rub_knowing_thb(value=value_money, rate=value_rate)}RUB"
 
         self.bot.send_message(message.from_user.id, message_out)
 
         self.bot.register_next_step_handler(message, self.get_money_value)
 
+    def start_refresh_ahead(self):
+        # курсы обновляются в фоне, команды пользователей читают уже полученные данные
+        if self.conf.exchange_conf.refresh_ahead:
+            self.bot_bank_connect.start_refresh_ahead()
+
     def run_infinity_poll(self):
+        self.start_refresh_ahead()
         self.bot.delete_webhook()
         self.bot.infinity_polling()
 
     def run_heroku_server(self):
+        # Flask нужен только в режиме webhook, поэтому импортируется при запуске сервера
+        from flask import Flask, request
+
         server = Flask(__name__)
         heroku_configuration = HerokuConfiguration()
+        self.start_refresh_ahead()
 
         @server.route(f'/{self.token}', methods=['POST'])
         def getMessage():
@@ -0,0 +1,100 @@
+import datetime
+import json
+import os
+import threading
+from typing import Optional, List, Dict, Tuple
+
+
+def row_date(row: dict) -> datetime.date:
+    """
+    функция получения даты строки котировок из поля Ddate формата dd/mm/yyyy
+    :param row: -> dict строка ответа GetChartfxrates
+    :return: -> date дата котировки
+    """
+    day, month, year = row.get('Ddate').split('/')
+    return datetime.date(int(year), int(month), int(day))
+
+
+def row_key(row: dict) -> Tuple[datetime.date, str]:
+    return row_date(row), (row.get('DTime') or '').strip()
+
+
+class BKKBRateHistory:
+    """
+    класс локальной истории котировок Bangkok Bank по каждому семейству валют.
+    строки графика котировок дописываются в файл семейства. строка с уже сохраненными (Ddate, DTime)
+    заменяет сохраненную (новая строка важнее), неизменившиеся строки повторно не записываются.
+    при пустом пути история хранится только в памяти
+    """
+
+    def __init__(self, path: str = ''):
+        """
+        :param path: -> str каталог файлов истории
+        """
+        self.path = path
+        self._rows: Dict[str, Dict[Tuple[datetime.date, str], dict]] = dict()
+        self._lock = threading.Lock()
+
+    def _family_path(self, family: str) -> str:
+        return os.path.join(self.path, f'{family}.jsonl')
+
+    def _load(self, family: str) -> Dict[Tuple[datetime.date, str], dict]:
+        if family in self._rows:
+            return self._rows[family]
+        rows = dict()
+        if self.path and os.path.exists(self._family_path(family)):
+            with open(self._family_path(family), encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        row = json.loads(line)
+                        # последующие строки файла заменяют более ранние с тем же ключом
+                        rows[row_key(row)] = row
+        self._rows[family] = rows
+        return rows
+
+    def merge(self, family: str, rows: List[dict]) -> List[dict]:
+        """
+        метод добавления новых строк котировок в историю
+        :param family: -> str семейство валюты
+        :param rows: -> list строки ответа GetChartfxrates
+        :return: -> list вся история семейства, отсортированная по дате и времени
+        """
+        with self._lock:
+            stored = self._load(family)
+            new_rows = []
+            for row in rows:
+                key = row_key(row)
+                if stored.get(key) != row:
+                    stored[key] = row
+                    new_rows.append(row)
+            if new_rows and self.path:
+                os.makedirs(self.path, exist_ok=True)
+                with open(self._family_path(family), 'a', encoding='utf-8') as file:
+                    for row in new_rows:
+                        file.write(json.dumps(row) + '\n')
+            return [stored[key] for key in sorted(stored)]
+
+    def rows(self, family: str) -> List[dict]:
+        with self._lock:
+            stored = self._load(family)
+            return [stored[key] for key in sorted(stored)]
+
+    def last_date(self, family: str) -> Optional[datetime.date]:
+        """
+        метод получения даты последней сохраненной котировки
+        :param family: -> str семейство валюты
+        :return: -> date дата последней котировки или None, если история пуста
+        """
+        with self._lock:
+            stored = self._load(family)
+            return max(stored)[0] if stored else None
+
+    def range(self, family: str, start: datetime.date, end: datetime.date) -> List[dict]:
+        """
+        метод получения котировок семейства за период
+        :param family: -> str семейство валюты
+        :param start: -> date начало периода включительно
+        :param end: -> date конец периода включительно
+        :return: -> list строки котировок, отсортированные по дате и времени
+        """
+        return [row for row in self.rows(family) if start <= row_date(row) <= end]
@@ -0,0 +1,105 @@
+import datetime
+from typing import Optional, Dict, List, NamedTuple, Iterator
+
+from src.storage.bkkb_rate_history import row_date, row_key
+
+# колонки курсов строки котировок Bangkok Bank
+RATE_COLUMNS = ('BuyingRates', 'SellingRates', 'SightBill', 'Bill_DD_TT', 'TT')
+
+
+def parse_rate(value: Optional[str]) -> Optional[float]:
+    """
+    функция приведения значения курса к числу. банк возвращает значения с пробелами, отсутствующий курс - '-'
+    :param value: -> str значение колонки курса
+    :return: -> float значение курса или None, если курс не указан
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class BKKBRate(NamedTuple):
+    """
+    котировки одного семейства валюты по всем колонкам курсов
+    """
+    family: str
+    date: Optional[datetime.date]
+    time: str
+    rates: Dict[str, Optional[float]]
+
+    @classmethod
+    def from_row(cls, row: dict) -> 'BKKBRate':
+        return cls(
+            family=row.get('Family', '').strip(),
+            date=row_date(row) if row.get('Ddate') else None,
+            time=row.get('DTime') or '',
+            rates={column: parse_rate(row.get(column)) for column in RATE_COLUMNS},
+        )
+
+    def get(self, rate_info: str = 'TT') -> Optional[float]:
+        return self.rates.get(rate_info)
+
+
+class BKKBRateSheet:
+    """
+    класс листа котировок Bangkok Bank: все колонки курсов по каждому семейству валют.
+    ответ API разбирается один раз, далее любой курс доступен без повторных запросов и разбора json
+    """
+
+    def __init__(self, rates: Optional[Dict[str, BKKBRate]] = None):
+        self._rates: Dict[str, BKKBRate] = rates or dict()
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> 'BKKBRateSheet':
+        """
+        метод построения листа котировок из строк ответа. для каждого семейства сохраняется последняя по времени строка
+        :param rows: -> list строки ответа GetLatestfxrates или GetChartfxrates
+        :return: -> BKKBRateSheet лист котировок
+        """
+        sheet = cls()
+        sheet.update(rows)
+        return sheet
+
+    def update(self, rows: List[dict]):
+        """
+        метод обновления котировок семейств строками ответа
+        :param rows: -> list строки ответа
+        """
+        last_rows = dict()
+        for row in rows:
+            family = row.get('Family', '').strip()
+            if not row.get('Ddate'):
+                last_rows[family] = row
+            elif family not in last_rows or row_key(row) >= row_key(last_rows[family]):
+                last_rows[family] = row
+        for family, row in last_rows.items():
+            self._rates[family] = BKKBRate.from_row(row)
+
+    def get(self, family: str) -> Optional[BKKBRate]:
+        return self._rates.get(family)
+
+    def rate(self, family: str, rate_info: str = 'TT') -> Optional[float]:
+        """
+        метод получения курса семейства
+        :param family: -> str семейство валюты
+        :param rate_info: -> str колонка курса
+        :return: -> float значение курса или None, если семейство или курс отсутствуют
+        """
+        rate = self._rates.get(family)
+        return rate.get(rate_info) if rate is not None else None
+
+    @property
+    def families(self) -> List[str]:
+        return list(self._rates)
+
+    def __contains__(self, family: str) -> bool:
+        return family in self._rates
+
+    def __iter__(self) -> Iterator[BKKBRate]:
+        return iter(self._rates.values())
+
+    def __len__(self) -> int:
+        return len(self._rates)
@@ -0,0 +1,84 @@
+import datetime
+
+from src.utils.calculation_utils import cast_money_bulk
+from src.utils.lazy_import import lazy_module
+
+np = lazy_module('numpy')
+pd = lazy_module('pandas')
+
+PRICE_FIELDS = ('open', 'close', 'high', 'low')
+
+
+class CandleArray:
+    """
+    класс компактного хранения свечей по колонкам в структурированном массиве NumPy.
+    время хранится в микросекундах UTC, цены - числами с плавающей точкой
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        """
+        :param data: -> numpy.ndarray структурированный массив с полями time / volume / open / close / high / low
+        """
+        self.data = data
+
+    @staticmethod
+    def dtype():
+        return np.dtype([('time', np.int64), ('volume', np.int64)] + [(field, np.float64) for field in PRICE_FIELDS])
+
+    @classmethod
+    def from_candles(cls, candles: list) -> 'CandleArray':
+        """
+        метод создания массива из списка свечей. поля Quotation всех цен переводятся в дробные значения
+        одним векторным проходом
+        :param candles: -> list список свечей HistoricCandle / Candle
+        :return: -> CandleArray
+        """
+        # целые и дробные части четырех цен каждой свечи собираются в одну матрицу
+        raw = np.array([(candle.open.units, candle.open.nano, candle.close.units, candle.close.nano,
+                         candle.high.units, candle.high.nano, candle.low.units, candle.low.nano)
+                        for candle in candles], dtype=np.int64).reshape(len(candles), 2 * len(PRICE_FIELDS))
+        prices = cast_money_bulk(raw[:, 0::2], raw[:, 1::2])
+        data = np.empty(len(candles), dtype=cls.dtype())
+        data['time'] = [round(candle.time.timestamp() * 1e6) for candle in candles]
+        data['volume'] = [candle.volume for candle in candles]
+        for position, field in enumerate(PRICE_FIELDS):
+            data[field] = prices[:, position]
+        return cls(data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def times(self):
+        return self.data['time']
+
+    @property
+    def closes(self):
+        return self.data['close']
+
+    def time_at(self, position: int) -> datetime.datetime:
+        """
+        метод получения времени свечи
+        :param position: -> int позиция свечи, допускаются отрицательные значения
+        :return: -> datetime время свечи в UTC
+        """
+        return datetime.datetime.fromtimestamp(int(self.data['time'][position]) / 1e6, tz=datetime.timezone.utc)
+
+    def max_price_at(self, position: int) -> float:
+        """
+        метод получения максимальной цены свечи среди open / close / high / low
+        :param position: -> int позиция свечи, допускаются отрицательные значения
+        :return: -> float максимальная цена
+        """
+        row = self.data[position]
+        return float(max(row[field] for field in PRICE_FIELDS))
+
+    def to_frame(self) -> 'pd.DataFrame':
+        """
+        метод преобразования в DataFrame объект
+        :return: -> DataFrame объект с колонками time / volume / open / close / high / low
+        """
+        frame = pd.DataFrame(self.data)
+        frame['time'] = pd.to_datetime(frame['time'], unit='us', utc=True)
+        return frame
@@ -0,0 +1,75 @@
+import datetime
+import threading
+from typing import Optional, Dict
+
+from src.storage.candle_array import CandleArray
+from src.utils.lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
+
+class CandleStore:
+    """
+    класс локального хранения часовых свечей по каждому FIGI.
+    свечи хранятся по колонкам в CandleArray за заданный период, при слиянии в массив переводятся только новые свечи.
+    незакрытая свеча при повторном получении заменяется.
+    сохраненный массив не изменяется: слияние создает новый массив, поэтому выданные массивы остаются согласованными
+    """
+
+    def __init__(self, history: datetime.timedelta):
+        """
+        :param history: -> timedelta период, за который хранятся свечи
+        """
+        self.history = history
+        self._candles: Dict[str, CandleArray] = dict()
+        self._lock = threading.Lock()
+
+    def last_time(self, figi: str) -> Optional[datetime.datetime]:
+        """
+        метод получения времени последней сохраненной свечи
+        :param figi: -> str код FIGI
+        :return: -> datetime время последней свечи в UTC или None, если свечей нет
+        """
+        with self._lock:
+            candles = self._candles.get(figi)
+        if not candles:
+            return None
+        return candles.time_at(-1)
+
+    def merge(self, figi: str, candles: list) -> Optional[CandleArray]:
+        """
+        метод слияния новых свечей с сохраненными. свечи с одинаковым временем заменяются новыми
+        :param figi: -> str код FIGI
+        :param candles: -> list список новых свечей
+        :return: -> CandleArray все сохраненные свечи по FIGI, отсортированные по времени, None - свечей нет
+        """
+        new = CandleArray.from_candles(candles).data if candles else None
+        with self._lock:
+            stored = self._candles.get(figi)
+            if new is None:
+                return stored
+            data = new if stored is None else np.concatenate([stored.data, new])
+            # новая свеча с тем же временем идет позже сохраненной: при обратном порядке unique оставляет ее
+            _, positions = np.unique(data['time'][::-1], return_index=True)
+            data = data[::-1][positions]
+            # удаляем свечи, вышедшие за период хранения
+            border = data['time'][-1] - round(self.history.total_seconds() * 1e6)
+            data = data[int(data['time'].searchsorted(border)):]
+            self._candles[figi] = CandleArray(data)
+            return self._candles[figi]
+
+    def get(self, figi: str) -> Optional[CandleArray]:
+        """
+        метод получения сохраненных свечей
+        :param figi: -> str код FIGI
+        :return: -> CandleArray свечи, отсортированные по времени, None - свечей нет
+        """
+        with self._lock:
+            return self._candles.get(figi)
+
+    def clear(self, figi: Optional[str] = None):
+        with self._lock:
+            if figi is None:
+                self._candles.clear()
+            else:
+                self._candles.pop(figi, None)
@@ -0,0 +1,114 @@
+import datetime
+import gzip
+import json
+import os
+import threading
+from typing import Optional, List
+
+from src.utils.http_tink_utils import logger_tinkoff_logs
+
+CATALOG_COLUMNS = ['ticker', 'figi', 'type', 'name']
+
+
+class InstrumentCatalog:
+    """
+    класс справочника инструментов брокера Тинькофф с хранением на диске.
+    справочник загружается с диска при старте, устаревшие данные обновляются в фоне
+    """
+
+    def __init__(self, client, path: str, ttl: datetime.timedelta):
+        """
+        :param client: -> TinkoffBankClient клиент для загрузки справочника
+        :param path: -> str путь к файлу справочника
+        :param ttl: -> timedelta срок актуальности справочника
+        """
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.saved_at: Optional[datetime.datetime] = None
+        self._instruments: Optional[List[dict]] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def is_expired(self) -> bool:
+        return self.saved_at is None or datetime.datetime.now() - self.saved_at > self.ttl
+
+    def load(self) -> bool:
+        """
+        метод загрузки справочника с диска
+        :return: -> bool True если справочник был загружен
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as e:
+            logger_tinkoff_logs.error('INSTRUMENT CATALOG %s IS BROKEN: %s', self.path, e)
+            return False
+        columns = data['columns']
+        with self._lock:
+            self._instruments = [dict(zip(columns, row)) for row in data['rows']]
+            self.saved_at = datetime.datetime.fromtimestamp(data['saved_at'])
+        logger_tinkoff_logs.debug('INSTRUMENT CATALOG HAS BEEN LOADED FROM %s', self.path)
+        return True
+
+    def save(self):
+        """
+        метод сохранения справочника на диск в сжатом виде, данные хранятся по колонкам без повтора ключей
+        """
+        with self._lock:
+            instruments, saved_at = self._instruments, self.saved_at
+        if instruments is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+            json.dump({
+                'saved_at': saved_at.timestamp(),
+                'columns': CATALOG_COLUMNS,
+                'rows': [[item[column] for column in CATALOG_COLUMNS] for item in instruments],
+            }, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """
+        метод загрузки справочника с API брокера и сохранения его на диск
+        """
+        instruments = self.client.get_all_figi_list()
+        with self._lock:
+            self._instruments = instruments
+            self.saved_at = datetime.datetime.now()
+        self.save()
+        logger_tinkoff_logs.debug('INSTRUMENT CATALOG HAS BEEN REFRESHED')
+
+    def refresh_in_background(self):
+        """
+        метод запуска фонового обновления справочника. повторно не запускается, пока идет обновление
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_safe, name='tinkoff-catalog-refresh',
+                                                daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_safe(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger_tinkoff_logs.error('INSTRUMENT CATALOG REFRESH FAILED: %s', e)
+
+    def get(self) -> List[dict]:
+        """
+        метод получения справочника. при первом обращении справочник читается с диска,
+        при отсутствии файла загружается с API. устаревший справочник отдается сразу и обновляется в фоне
+        :return: -> list список данных по каждому инструменту
+        """
+        if self._instruments is None and not self.load():
+            self.refresh()
+        elif self.is_expired:
+            self.refresh_in_background()
+        return self._instruments
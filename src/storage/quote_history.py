@@ -0,0 +1,108 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, List, Tuple, Iterable
+
+
+class QuoteHistory:
+    """
+    класс истории рассчитанных котировок. котировки дописываются в таблицу SQLite
+    с первичным ключом (pair, time), поэтому запрос за период по паре читает индекс без полного просмотра.
+    при пустом пути история хранится в памяти. время котировок возвращается в UTC.
+    при заданном min_interval время делится на интервалы, в каждом интервале хранится последняя котировка пары:
+    более новая котировка заменяет сохраненную. котировки старше retention_days удаляются при записи
+    """
+
+    def __init__(self, path: str = '', min_interval: float = 0, retention_days: Optional[float] = None):
+        """
+        :param path: -> str путь к файлу базы данных
+        :param min_interval: -> float интервал в секундах, за который хранится одна котировка пары, 0 - все котировки
+        :param retention_days: -> float срок хранения котировок в днях, None - без ограничения
+        """
+        self.path = path
+        self.min_interval = min_interval
+        self.retention_days = retention_days
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path or ':memory:', timeout=30, isolation_level=None,
+                                           check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path:
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS quotes '
+                                     '(pair TEXT NOT NULL, time REAL NOT NULL, rate REAL NOT NULL, '
+                                     'PRIMARY KEY (pair, time)) WITHOUT ROWID')
+
+    def append(self, pair: str, time: datetime.datetime, rate: float):
+        self.append_many([(pair, time, rate)])
+
+    def append_many(self, quotes: Iterable[Tuple[str, datetime.datetime, float]]):
+        """
+        метод добавления котировок. котировка пары с уже сохраненным временем не перезаписывается.
+        при заданном min_interval котировка заменяет более раннюю котировку пары того же интервала,
+        более ранняя или совпадающая по курсу котировка интервала не записывается
+        :param quotes: -> Iterable записи (пара, время, курс)
+        """
+        rows = [(pair, quote_time.timestamp(), float(rate)) for pair, quote_time, rate in quotes]
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                if self.min_interval > 0:
+                    for row in rows:
+                        self._replace_in_interval(*row)
+                else:
+                    self._connection.executemany('INSERT OR IGNORE INTO quotes (pair, time, rate) VALUES (?, ?, ?)',
+                                                 rows)
+                if self.retention_days is not None:
+                    # срок хранения проверяется по индексу (pair, time) только для записанных пар
+                    expired = time.time() - self.retention_days * 24 * 60 * 60
+                    self._connection.executemany('DELETE FROM quotes WHERE pair = ? AND time < ?',
+                                                 [(pair, expired) for pair in {row[0] for row in rows}])
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+
+    def _replace_in_interval(self, pair: str, quote_time: float, rate: float):
+        start = quote_time - quote_time % self.min_interval
+        bounds = (pair, start, start + self.min_interval)
+        stored = self._connection.execute('SELECT time, rate FROM quotes WHERE pair = ? AND time >= ? AND time < ? '
+                                          'ORDER BY time DESC LIMIT 1', bounds).fetchone()
+        if stored is not None and (stored[0] > quote_time or stored[1] == rate):
+            return
+        self._connection.execute('DELETE FROM quotes WHERE pair = ? AND time >= ? AND time < ?', bounds)
+        self._connection.execute('INSERT INTO quotes (pair, time, rate) VALUES (?, ?, ?)', (pair, quote_time, rate))
+
+    def range(self, pair: str, start: datetime.datetime,
+              end: Optional[datetime.datetime] = None) -> List[Tuple[datetime.datetime, float]]:
+        """
+        метод получения котировок пары за период
+        :param pair: -> str пара, например RUB_THB
+        :param start: -> datetime начало периода включительно
+        :param end: -> datetime конец периода включительно, None - до последней котировки
+        :return: -> list записи (время UTC, курс) по возрастанию времени
+        """
+        end_time = end.timestamp() if end is not None else float('inf')
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT time, rate FROM quotes WHERE pair = ? AND time BETWEEN ? AND ? ORDER BY time',
+                (pair, start.timestamp(), end_time)).fetchall()
+        return [(datetime.datetime.fromtimestamp(quote_time, tz=datetime.timezone.utc), rate) for quote_time, rate in rows]
+
+    def last(self, pair: str) -> Optional[Tuple[datetime.datetime, float]]:
+        with self._lock:
+            row = self._connection.execute('SELECT time, rate FROM quotes WHERE pair = ? ORDER BY time DESC LIMIT 1',
+                                           (pair,)).fetchone()
+        return (datetime.datetime.fromtimestamp(row[0], tz=datetime.timezone.utc), row[1]) if row is not None else None
+
+    @property
+    def pairs(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._connection.execute('SELECT DISTINCT pair FROM quotes ORDER BY pair')]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
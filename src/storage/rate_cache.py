@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterator, NamedTuple, Tuple
+
+
+class RateSnapshot(NamedTuple):
+    """
+    снимок курса поставщика: курс, сообщение и время обновления (секунды unix)
+    """
+    rate: float
+    message: str
+    time: float
+
+
+class RateCacheBackend(ABC):
+    """
+    интерфейс общего кэша курсов. кэш хранит последние снимки курсов и дает блокировку на обновление,
+    чтобы курс поставщика обновлял только один процесс. блокировка - аренда с ограниченным временем жизни
+    (аналог SET NX PX), поэтому реализацию можно построить и поверх Redis-совместимого хранилища
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[RateSnapshot]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, snapshot: RateSnapshot):
+        pass
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        попытка взять блокировку ключа
+        :param key: -> str ключ курса
+        :param owner: -> str идентификатор владельца блокировки
+        :param ttl: -> float время жизни блокировки в секундах, после него блокировка считается снятой
+        :return: -> bool взята ли блокировка
+        """
+        pass
+
+    @abstractmethod
+    def release(self, key: str, owner: str):
+        pass
+
+    @contextmanager
+    def lock(self, key: str, ttl: float = 60, timeout: Optional[float] = None,
+             poll_interval: float = 0.05) -> Iterator[bool]:
+        """
+        блокировка ключа с ожиданием
+        :param key: -> str ключ курса
+        :param ttl: -> float время жизни блокировки в секундах
+        :param timeout: -> float максимальное время ожидания в секундах, None - без ограничения
+        :param poll_interval: -> float период повторных попыток в секундах
+        :return: -> bool взята ли блокировка (False - истекло время ожидания)
+        """
+        owner = uuid.uuid4().hex
+        deadline = None if timeout is None else time.monotonic() + timeout
+        acquired = self.acquire(key, owner, ttl)
+        while not acquired and (deadline is None or time.monotonic() < deadline):
+            time.sleep(poll_interval)
+            acquired = self.acquire(key, owner, ttl)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(key, owner)
+
+
+class MemoryRateCache(RateCacheBackend):
+    """
+    кэш курсов в памяти процесса
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, RateSnapshot] = dict()
+        self._locks: Dict[str, Tuple[str, float]] = dict()
+        self._mutex = threading.Lock()
+
+    def get(self, key: str) -> Optional[RateSnapshot]:
+        return self._snapshots.get(key)
+
+    def set(self, key: str, snapshot: RateSnapshot):
+        self._snapshots[key] = snapshot
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        with self._mutex:
+            lock = self._locks.get(key)
+            if lock is not None and lock[1] > time.time():
+                return False
+            self._locks[key] = (owner, time.time() + ttl)
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._mutex:
+            if self._locks.get(key, (None,))[0] == owner:
+                del self._locks[key]
+
+
+class SQLiteRateCache(RateCacheBackend):
+    """
+    кэш курсов в файле SQLite, общий для всех процессов на одной машине (например, воркеров gunicorn).
+    блокировка хранится в таблице locks и берется в транзакции BEGIN IMMEDIATE
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: -> str путь к файлу базы данных
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS rates '
+                               '(key TEXT PRIMARY KEY, rate REAL, message TEXT, time REAL)')
+            connection.execute('CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT, expires REAL)')
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # соединение sqlite3 нельзя использовать из разных потоков, у каждого потока свое соединение
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        else:
+            connection.execute('COMMIT')
+
+    def get(self, key: str) -> Optional[RateSnapshot]:
+        row = self.connection.execute('SELECT rate, message, time FROM rates WHERE key = ?', (key,)).fetchone()
+        return RateSnapshot(*row) if row is not None else None
+
+    def set(self, key: str, snapshot: RateSnapshot):
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO rates (key, rate, message, time) VALUES (?, ?, ?, ?)',
+                               (key, *snapshot))
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute('SELECT expires FROM locks WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[0] > now:
+                return False
+            connection.execute('INSERT OR REPLACE INTO locks (key, owner, expires) VALUES (?, ?, ?)',
+                               (key, owner, now + ttl))
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM locks WHERE key = ? AND owner = ?', (key, owner))
+
+
+def make_rate_cache(backend: str, path: str = '') -> RateCacheBackend:
+    """
+    функция создания кэша курсов по названию
+    :param backend: -> str memory или sqlite
+    :param path: -> str путь к файлу базы данных для sqlite
+    :return: -> RateCacheBackend кэш курсов
+    """
+    if backend == 'sqlite':
+        return SQLiteRateCache(path)
+    if backend == 'memory':
+        return MemoryRateCache()
+    raise ValueError(f'UNKNOWN RATE CACHE BACKEND: {backend}')
@@ -1,6 +1,10 @@
 import datetime
 from datetime import timedelta
 
+from src.utils.lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
 
 def buy_rub_knowing_rub(value, rate):
     return round(value / rate, 2)
@@ -10,6 +14,26 @@ def buy_rub_knowing_thb(value, rate):
     return round(value * rate, 2)
 
 
+def buy_rub_knowing_rub_bulk(values, rates):
+    """
+    векторный вариант buy_rub_knowing_rub для массива сумм
+    :param values: массив сумм в RUB
+    :param rates: курс RUB / THB, число или массив той же формы
+    :return: -> numpy.ndarray суммы в THB
+    """
+    return np.round(np.asarray(values, dtype=np.float64) / rates, 2)
+
+
+def buy_rub_knowing_thb_bulk(values, rates):
+    """
+    векторный вариант buy_rub_knowing_thb для массива сумм
+    :param values: массив сумм в THB
+    :param rates: курс RUB / THB, число или массив той же формы
+    :return: -> numpy.ndarray суммы в RUB
+    """
+    return np.round(np.asarray(values, dtype=np.float64) * rates, 2)
+
+
 def cast_money(v):
     """
     функция формирвоания дробного значение котировки валюты
@@ -19,6 +43,72 @@ def cast_money(v):
     return v.units + v.nano / 1e9  # units - целое значение nano - дробное значение 9 нулей после точки
 
 
+def cast_money_bulk(units, nano):
+    """
+    функция векторного формирования дробных значений котировок за один проход
+    :param units: массив целых частей значений
+    :param nano: массив дробных частей значений, 9 знаков после точки
+    :return: -> numpy.ndarray массив чисел с плавающей точкой той же формы
+    """
+    return np.asarray(units, dtype=np.int64) + np.asarray(nano, dtype=np.int64) / 1e9
+
+
+class IncrementalEma:
+    """
+    класс экспоненциальной скользящей средней с обновлением за O(1) на каждую свечу.
+    результат совпадает с ta.trend.ema_indicator (adjust=False, значения до заполнения окна отсутствуют).
+    повторное получение свечи с тем же временем пересчитывает только последнее значение
+    """
+
+    def __init__(self, window: int):
+        """
+        :param window: -> int размер окна EMA
+        """
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_time = None
+        self._ema = None
+        self._previous_ema = None
+
+    @property
+    def value(self):
+        """
+        текущее значение EMA, None пока количество свечей меньше окна
+        """
+        return self._ema if self.count >= self.window else None
+
+    def update(self, time, close: float):
+        """
+        метод учета новой или изменившейся свечи
+        :param time: время свечи
+        :param close: -> float цена закрытия свечи
+        :return: текущее значение EMA
+        """
+        if self.last_time is not None and time < self.last_time:
+            return self.value
+        if self.last_time is None or time > self.last_time:
+            self._previous_ema = self._ema
+            self.last_time = time
+            self.count += 1
+        base = self._previous_ema
+        self._ema = close if base is None else base + self.alpha * (close - base)
+        return self.value
+
+    def seed(self, times, closes):
+        """
+        метод заполнения EMA по истории свечей
+        :param times: времена свечей по возрастанию
+        :param closes: цены закрытия свечей
+        """
+        self.reset()
+        for time, close in zip(times, closes):
+            self.update(time, close)
+
+
 def is_time_to_update(time):
     delta = datetime.datetime.now() - time
     return delta > timedelta(hours=1, minutes=1)
\ No newline at end of file
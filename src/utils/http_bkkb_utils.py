@@ -24,3 +24,20 @@ def check_status(msg: str = "default") -> Callable:
         return wrapper
 
     return decorator
+
+
+def check_status_async(msg: str = "default") -> Callable:
+    """
+    вариант check_status для корутин асинхронного клиента
+    """
+    def decorator(f: Callable):
+        async def wrapper(*args, **kwargs):
+            resp = await f(*args, **kwargs)
+            if resp.status_code == 401:
+                logger_bkkbanks_logs.error(f'{msg} %s', resp.reason)
+                raise BadAuthException(resp.reason)
+            return resp
+
+        return wrapper
+
+    return decorator
@@ -1,28 +1,33 @@
 from typing import Callable
 
-from tinkoff.invest import RequestError, Client
-
 from src.config.configurator import TinkLogerConfiguration
 from src.logger.logger import Zlogger
 from src.utils.bad_auth_exception import BadAuthException
+from src.utils.lazy_import import lazy_module
+
+invest = lazy_module('tinkoff.invest')
 
 
 conf = TinkLogerConfiguration()
 logger_tinkoff_logs = Zlogger(conf=conf)
 
+# коды ошибок grpc.StatusCode, после которых канал закрывается и авторизация проверяется заново
+AUTH_ERROR_CODES = ('UNAUTHENTICATED', 'PERMISSION_DENIED')
+
 
 def check_status_client() -> Callable:
-    def decorator(f: Callable[..., Client]):
+    def decorator(f: Callable):
 
-        def wrapper(*args, **kwargs) -> Client:
+        def wrapper(self, *args, **kwargs):
             try:
-                with f(*args, **kwargs) as client:
-                    client.users.get_accounts()
-            except RequestError as e:
+                return f(self, *args, **kwargs)
+            except invest.RequestError as e:
                 error_message = e.metadata.message
                 logger_tinkoff_logs.error(error_message)
-                raise BadAuthException(error_message)
-            return f(*args, **kwargs)
+                if e.code.name in AUTH_ERROR_CODES:
+                    self.channel.reset()
+                    raise BadAuthException(error_message)
+                raise
 
         return wrapper
 
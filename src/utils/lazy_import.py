@@ -0,0 +1,37 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    класс отложенного импорта модуля. модуль импортируется при первом обращении к его атрибуту,
+    что позволяет не загружать тяжелые зависимости при старте приложения
+    """
+
+    def __init__(self, name: str):
+        super(LazyModule, self).__init__(name)
+        self._module = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def _load(self) -> types.ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    функция получения модуля с отложенным импортом
+    :param name: -> str полное имя модуля, например 'tinkoff.invest'
+    :return: -> LazyModule модуль, импортируемый при первом обращении
+    """
+    return LazyModule(name)
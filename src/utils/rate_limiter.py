@@ -0,0 +1,35 @@
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """
+    класс ограничения частоты запросов скользящим окном.
+    не более max_calls вызовов acquire за period секунд, лишние вызовы ожидают освобождения окна
+    """
+
+    def __init__(self, max_calls: int, period: float = 60):
+        """
+        :param max_calls: -> int максимальное количество запросов за период
+        :param period: -> float длина периода, секунды
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        метод ожидания разрешения на очередной запрос
+        """
+        while True:
+            with self._lock:
+                moment = time.monotonic()
+                while self._calls and moment - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(moment)
+                    return
+                delay = self.period - (moment - self._calls[0])
+            time.sleep(delay)
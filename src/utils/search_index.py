@@ -0,0 +1,69 @@
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+
+def make_trigrams(text: str) -> Set[str]:
+    """
+    функция разбиения строки на триграммы. строка приводится к нижнему регистру и дополняется пробелами,
+    чтобы начало слова давало отдельные триграммы
+    :param text: -> str исходная строка
+    :return: -> set множество триграмм
+    """
+    padded = f'  {text.lower()} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    класс индекса нечеткого поиска по триграммам. индекс строится один раз,
+    поиск проверяет только строки, имеющие общие триграммы с запросом
+    """
+
+    def __init__(self, values: List[str]):
+        """
+        :param values: -> list строки для индексации, результатом поиска являются их позиции в списке
+        """
+        self.values = [value.lower() for value in values]
+        self._postings: Dict[str, List[int]] = dict()
+        for position, value in enumerate(self.values):
+            for trigram in make_trigrams(value):
+                self._postings.setdefault(trigram, []).append(position)
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[int, float]]:
+        """
+        метод поиска строк, близких к запросу
+        :param query: -> str строка запроса
+        :param limit: -> int максимальное количество результатов
+        :param min_score: -> float минимальная доля совпавших триграмм запроса
+        :return: -> list пары (позиция строки, оценка), отсортированные по убыванию оценки
+        """
+        query_trigrams = make_trigrams(query)
+        if not query_trigrams:
+            return []
+        matches = Counter()
+        for trigram in query_trigrams:
+            matches.update(self._postings.get(trigram, ()))
+        query = query.lower()
+        results = []
+        for position, count in matches.items():
+            score = count / len(query_trigrams)
+            # точное вхождение подстроки поднимается выше частичных совпадений
+            if query in self.values[position]:
+                score += 1
+            if score >= min_score:
+                results.append((position, score))
+        results.sort(key=lambda result: (-result[1], len(self.values[result[0]]), result[0]))
+        return results[:limit]
+
+    def contains(self, substring: str) -> List[int]:
+        """
+        метод поиска строк, содержащих подстроку. кандидаты отбираются по триграммам подстроки
+        :param substring: -> str искомая подстрока
+        :return: -> list позиции строк в порядке индексации
+        """
+        substring = substring.lower()
+        trigrams = {substring[i:i + 3] for i in range(len(substring) - 2)}
+        if not trigrams:
+            return [position for position, value in enumerate(self.values) if substring in value]
+        candidates = set.intersection(*(set(self._postings.get(trigram, ())) for trigram in trigrams))
+        return sorted(position for position in candidates if substring in self.values[position])
@@ -13,6 +13,9 @@ from src.config.configurator import BKKBConfiguration
 def pytest_configure(config):
     os.environ['BKKB_LOGS_FILE'] = ''
     os.environ['TINK_LOGS_FILE'] = ''
+    os.environ['CONVERTOR_LOGS_FILE'] = ''
+    os.environ['BKKB_HISTORY_PATH'] = ''
+    os.environ['QUOTE_HISTORY_PATH'] = ''
 
 
 @pytest.fixture()
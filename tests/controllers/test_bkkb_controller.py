@@ -97,6 +97,69 @@ def test_format_get_x_rate_incorrect_none(get_lak_update_rates, bkkb_client_df,
     assert response_tuple == (None, None)
 
 
+def test_families_cached(get_family_response, bkkb_client_df, make_response_object):
+    make_fake_families_response(get_family_response, bkkb_client_df, make_response_object)
+    assert bkkb_client_df.format_get_family_by_currency('Laos Kip') == 'LAK'
+    assert bkkb_client_df.format_get_family_by_currency('Euro') == 'EUR'
+    assert len(bkkb_client_df.format_get_close_families_by_reg_name('dollar')) > 3
+    bkkb_client_df.client.get_all_values_families.assert_called_once()
+    assert bkkb_client_df.format_all_values_family()['Description'].iloc[0] == 'US Dollar 1-2'
+
+
+def test_families_expired(get_family_response, bkkb_client_df, make_response_object):
+    make_fake_families_response(get_family_response, bkkb_client_df, make_response_object)
+    bkkb_client_df.family_ttl = datetime.timedelta(seconds=0)
+    bkkb_client_df.format_get_family_by_currency('Laos Kip')
+    bkkb_client_df.format_get_family_by_currency('Laos Kip')
+    assert bkkb_client_df.client.get_all_values_families.call_count == 2
+
+
+def test_format_get_close_families_by_reg_expression(get_family_response, bkkb_client_df, make_response_object):
+    make_fake_families_response(get_family_response, bkkb_client_df, make_response_object)
+    df = bkkb_client_df.format_get_close_families_by_reg_name(reg_currency='^us dollar [15]-')
+    assert df['Family'].tolist() == ['USD1', 'USD5']
+
+
+def test_format_get_x_rate_delta_fetch(get_lak_update_rates, bkkb_client_df, make_response_object):
+    make_fake_rate_request(get_lak_update_rates, bkkb_client_df, make_response_object)
+    bkkb_client_df.format_get_x_rate(dict(day='02', month='03', year='2023'), 'LAK')
+    rate, message = bkkb_client_df.format_get_x_rate(dict(day='01', month='03', year='2023'), 'LAK')
+    date_list = bkkb_client_df.client.get_last_all_rate_update_for_value.call_args.args[0]
+    assert date_list == dict(day='04', month='03', year='2023')
+    assert rate == 1.75
+    history = bkkb_client_df.format_get_rate_history('LAK', datetime.date(2023, 3, 1), datetime.date(2023, 3, 31))
+    assert history == [(datetime.date(2023, 3, 4), '', 1.75)]
+
+
+def test_format_get_x_rate_missing_rate_falls_back(get_lak_update_rates, bkkb_client_df, make_response_object):
+    missing = dict(get_lak_update_rates[0], TT="-         ", Ddate="05/03/2023")
+    make_fake_rate_request(get_lak_update_rates + [missing], bkkb_client_df, make_response_object)
+    rate, message = bkkb_client_df.format_get_x_rate(dict(day='02', month='03', year='2023'), 'LAK')
+    assert rate == 1.75
+    assert 'None' not in message
+    assert 'Update:  03/04/2023' in message
+    history = bkkb_client_df.format_get_rate_history('LAK', datetime.date(2023, 3, 1), datetime.date(2023, 3, 31))
+    assert history == [(datetime.date(2023, 3, 4), '', 1.75)]
+
+
+def test_format_get_x_rate_missing_rate_only(get_lak_update_rates, bkkb_client_df, make_response_object):
+    missing = dict(get_lak_update_rates[0], TT="-         ")
+    make_fake_rate_request([missing], bkkb_client_df, make_response_object)
+    assert bkkb_client_df.format_get_x_rate(dict(day='02', month='03', year='2023'), 'LAK') == (None, None)
+
+
+def test_format_rate_sheet(get_lak_update_rates, get_usd_update_rates, get_last_data_response, bkkb_client_df,
+                           make_response_object):
+    fake_response = make_response_object(get_lak_update_rates + get_usd_update_rates, 200)
+    bkkb_client_df.client.get_latest_rates = MagicMock(return_value=fake_response)
+    update = dict(day='24', month='04', year='2023', last_time_update='09:10')
+    sheet = bkkb_client_df.format_rate_sheet(update)
+    assert sheet.rate('USD50', 'SellingRates') == 82.83
+    assert sheet.rate('LAK', 'BuyingRates') == 1.52
+    assert bkkb_client_df.format_rate_sheet(update) is sheet
+    bkkb_client_df.client.get_latest_rates.assert_called_once()
+
+
 def make_fake_update_response(get_last_data_response, bkkb_client_df, make_response_object):
     fake_response = make_response_object(get_last_data_response, 200)
     bkkb_client_df.client.get_last_update = MagicMock(return_value=fake_response)
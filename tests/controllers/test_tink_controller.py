@@ -1,7 +1,11 @@
+import datetime
 import re
+from copy import copy
 
 import pytest
 from src.controllers.tink_controller import TinkoffDataFrameFormat, CandlesDataFrame
+from src.storage.candle_store import CandleStore
+from src.utils.calculation_utils import IncrementalEma
 
 
 @pytest.fixture
@@ -110,3 +114,54 @@ def test_get_xrate_dict_format(candles_df_data):
     assert message.count('\n') == 4
     assert update_time == time_correct_result
     assert max_rate == 35839.0
+
+
+def test_candles_from_store(tink_candles_history):
+    store = CandleStore(history=datetime.timedelta(days=3))
+    array = store.merge('FIGI', tink_candles_history)
+    candles = CandlesDataFrame.from_store(store, 'FIGI')
+    # массив хранилища используется без повторного преобразования свечей
+    assert candles.array is array
+    assert candles.get_xrate_dict_format()[0] == 35839.0
+    assert CandlesDataFrame.from_store(store, 'EMPTY_FIGI').candles is None
+
+
+def test_get_by_figi(tink_df_data):
+    instrument = tink_df_data.get_by_figi('FUTCNY062200')
+    assert instrument['ticker'] == 'CRM2'
+    assert tink_df_data.get_by_figi('INCORRECT_FIGI') is None
+
+
+def test_search_by_name(tink_df_data):
+    result_data = tink_df_data.search_by_name('индекс ртс')
+    assert result_data['name'].iloc[0] == 'RTS-3.22 Индекс РТС'
+    assert result_data['score'].is_monotonic_decreasing
+
+
+def test_search_by_name_with_typo(tink_df_data):
+    result_data = tink_df_data.search_by_name('Газпрм')
+    assert result_data['ticker'].iloc[0] == 'GZM2'
+
+
+def test_search_by_incorrect_name(tink_df_data):
+    assert tink_df_data.search_by_name('INCORRECT_NAME').empty is True
+
+
+def test_candles_from_batch(tink_candles_history):
+    candles_frames = CandlesDataFrame.from_batch({'FIGI': tink_candles_history, 'INCORRECT_FIGI': None})
+    assert candles_frames['FIGI'].get_xrate_dict_format()[0] == 35839.0
+    assert candles_frames['INCORRECT_FIGI'].get_xrate_dict_format() == (None, None)
+
+
+def test_get_xrate_dict_format_incremental_ema(tink_candles_history):
+    candles = []
+    for hour in range(12):
+        candle = copy(tink_candles_history[hour % 4])
+        candle.time = tink_candles_history[0].time + datetime.timedelta(hours=hour)
+        candles.append(candle)
+    ema = IncrementalEma(window=9)
+    CandlesDataFrame(candles[:-1], ema).get_xrate_dict_format()
+    max_rate, _ = CandlesDataFrame(candles, ema).get_xrate_dict_format()
+    data = CandlesDataFrame(candles).get_xrates_ema_dataframe().iloc[-1]
+    assert ema.count == 12
+    assert max_rate == round(max(data.open, data.close, data.high, data.low, data.ema), 2)
@@ -2,9 +2,11 @@ import re
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock
 
+from requests import ReadTimeout
+
 from src.utils.bad_auth_exception import BadAuthException
 from src.config.configurator import BKKBConfiguration
-from src.controllers.usd_contollers.bangkok_usd_thb_controller import LastUSDToTHBRates
+from src.controllers.usd_contollers.bangkok_usd_thb_controller import LastUSDToTHBRates, usd_family_by_amount
 
 
 def test_get_usd_to_thb_rate(get_last_data_response, get_usd_update_rates, make_response_object):
@@ -29,3 +31,56 @@ def test_bad_auth_exception():
     usd_to_thb_bad = LastUSDToTHBRates(conf=bad_conf)
     usd_to_thb_bad.client.format_update_data = MagicMock(side_effect=BadAuthException)
     assert usd_to_thb_bad.get_usd_to_thb_rates() is None
+
+
+def test_request_exception():
+    conf = BKKBConfiguration(token='TOKEN')
+    usd_to_thb = LastUSDToTHBRates(conf=conf)
+    usd_to_thb.client.format_update_data = MagicMock(side_effect=ReadTimeout)
+    assert usd_to_thb.get_usd_to_thb_rates() is None
+
+
+def test_get_usd_to_thb_rate_not_updated(get_last_data_response, get_usd_update_rates, make_response_object):
+    conf = BKKBConfiguration(token="TOKEN")
+    usd_to_thb = LastUSDToTHBRates(conf=conf)
+    usd_to_thb.client.client.get_last_update = MagicMock(
+        return_value=make_response_object(get_last_data_response, 200))
+    usd_to_thb.client.get_x_rate = MagicMock(return_value=make_response_object(get_usd_update_rates, 200))
+    first_rates = usd_to_thb.get_usd_to_thb_rates()
+    second_rates = usd_to_thb.get_usd_to_thb_rates()
+    assert first_rates == second_rates
+    assert usd_to_thb.client.get_x_rate.call_count == 3
+
+    get_last_data_response[0]['Time'] = '15:30     '
+    usd_to_thb.client.client.get_last_update = MagicMock(
+        return_value=make_response_object(get_last_data_response, 200))
+    usd_to_thb.get_usd_to_thb_rates()
+    assert usd_to_thb.client.get_x_rate.call_count == 6
+
+
+def test_usd_family_by_amount():
+    assert usd_family_by_amount(0.5) == 'USD1'
+    assert usd_family_by_amount(2) == 'USD1'
+    assert usd_family_by_amount(20) == 'USD5'
+    assert usd_family_by_amount(50) == 'USD50'
+    assert usd_family_by_amount(1000) == 'USD50'
+
+
+def test_get_usd_to_thb_tier_rates(get_last_data_response, get_usd_update_rates, make_response_object):
+    conf = BKKBConfiguration(token="TOKEN")
+    usd_to_thb = LastUSDToTHBRates(conf=conf)
+    tier_rates = {'USD1': '79.10', 'USD5': '80.40', 'USD50': '81.75'}
+
+    def get_x_rate(date_list, family):
+        rows = [dict(get_usd_update_rates[0], Family=family, TT=tier_rates[family])]
+        return make_response_object(rows, 200)
+
+    usd_to_thb.client.client.get_last_update = MagicMock(
+        return_value=make_response_object(get_last_data_response, 200))
+    usd_to_thb.client.get_x_rate = MagicMock(side_effect=get_x_rate)
+    rate, message = usd_to_thb.get_usd_to_thb_rates()
+    assert rate == 81.75
+    assert usd_to_thb.get_tier_rate(1)[0] == 79.10
+    assert usd_to_thb.get_tier_rate(10)[0] == 80.40
+    assert usd_to_thb.get_tier_rate(100)[0] == 81.75
+    assert usd_to_thb.client.get_x_rate.call_count == 3
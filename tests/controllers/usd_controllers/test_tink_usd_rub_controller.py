@@ -2,6 +2,7 @@ import re
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock
 
+from src.clients.const import FIGI_USD
 from src.utils.bad_auth_exception import BadAuthException
 from src.config.configurator import TinkBankConfiguration
 from src.controllers.usd_contollers.tinkoff_usd_rub_controller import LastUSDToRUBRates
@@ -28,3 +29,16 @@ def test_get_usd_last_rate(tink_candles_history):
     assert (rate, message) != (None, None)
     assert type(message) == str
     assert time_delta < timedelta(days=4)
+
+
+def test_get_usd_last_rate_streaming(tink_candles_history):
+    conf = TinkBankConfiguration(token="TOKEN", streaming=True)
+    usd_to_rub = LastUSDToRUBRates(conf=conf)
+    usd_to_rub.client.candle_store.merge(FIGI_USD, tink_candles_history)
+    usd_to_rub.client.get_candles_by_figi = MagicMock()
+    usd_to_rub.streamer.start = MagicMock()
+    rate, message = usd_to_rub.get_usd_last_rate()
+    usd_to_rub.streamer.start.assert_called_once()
+    assert usd_to_rub.streaming is True
+    assert rate == 35839.0
+    assert type(message) == str
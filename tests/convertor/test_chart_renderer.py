@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+
+from src.convertor.chart_renderer import ChartRenderer, ChartSeries, render_chart_png
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture
+def series():
+    start = datetime.datetime(2023, 4, 1, 10, 0)
+    times = [start + datetime.timedelta(hours=hour) for hour in range(12)]
+    values = [2.4 + hour / 100 for hour in range(12)]
+    return ChartSeries('RUB_THB', times, values, [None] * 8 + values[8:])
+
+
+@pytest.fixture
+def renderer():
+    renderer = ChartRenderer(max_workers=1)
+    yield renderer
+    renderer.close()
+
+
+def test_render_chart_png(series):
+    assert render_chart_png(series, 3).startswith(PNG_SIGNATURE)
+
+
+def test_series_version(series):
+    assert series.version == (12, series.times[-1], series.values[-1])
+    assert ChartSeries('RUB_THB', [], []).version == (0,)
+
+
+def test_renderer_cache(renderer, series):
+    future = renderer.render(series, 3)
+    assert future.result(timeout=60).startswith(PNG_SIGNATURE)
+    assert renderer.render(series, 3) is future
+    assert renderer.render(series, 7) is not future
+    changed = series._replace(values=series.values[:-1] + [2.6])
+    assert renderer.render(changed, 3) is not future
+
+
+def test_renderer_cache_size(series):
+    renderer = ChartRenderer(cache_size=1)
+    try:
+        renderer.render(series, 3).result(timeout=60)
+        renderer.render(series, 7).result(timeout=60)
+        assert list(renderer._cache) == [('RUB_THB', 7, series.version)]
+    finally:
+        renderer.close()
@@ -1,9 +1,19 @@
+import asyncio
+import dataclasses
 import datetime
+import threading
+import time
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pytest
 
 from src.config.configurator import ExchangeConvertorConfiguration
-from src.convertor.convertor import ValueRate, ValueData, ExchangeConvertor
+from src.bin.convert_csv import convert_csv
+from src.clients.const import FIGI_USD
+from src.controllers.const import RUB_THB, RUB_THB_ZDV, USD_RUB, QUOTE_PAIRS
+from src.convertor.convertor import ValueRate, ValueData, ExchangeConvertor, ConversionSnapshot
 
 conf = ExchangeConvertorConfiguration()
 
@@ -85,26 +95,24 @@ def test_get_exchange_message_no_need_to_update():
 def test_get_exchange_message_tink_no_need_to_update():
     convertor = ExchangeConvertor(conf=conf)
     convertor.tink_rates.rate = 1
-    convertor.thb_rates.rate = 30
     convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
     convertor.tink_rates._time = datetime.datetime.now()
     rate, message = convertor.get_exchange_message_rub_thb()
     assert rate != 1.02
     assert convertor.tink_rates.rate == 1
-    assert convertor.thb_rates.rate != 30
+    assert convertor.thb_rates.rate != 0
     assert datetime.datetime.now() - convertor.thb_rates._time < datetime.timedelta(minutes=1)
     assert datetime.datetime.now() - convertor.tink_rates._time < datetime.timedelta(minutes=1)
 
 
 def test_get_exchange_message_bkkb_no_need_to_update():
     convertor = ExchangeConvertor(conf=conf)
-    convertor.tink_rates.rate = 1
     convertor.thb_rates.rate = 30
     convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
     convertor.thb_rates._time = datetime.datetime.now()
     rate, message = convertor.get_exchange_message_rub_thb()
     assert rate != 1.02
-    assert convertor.tink_rates.rate != 1
+    assert convertor.tink_rates.rate != 0
     assert convertor.thb_rates.rate == 30
     assert datetime.datetime.now() - convertor.thb_rates._time < datetime.timedelta(minutes=1)
     assert datetime.datetime.now() - convertor.tink_rates._time < datetime.timedelta(minutes=1)
@@ -112,12 +120,271 @@ def test_get_exchange_message_bkkb_no_need_to_update():
 
 def test_get_exchange_message_need_to_update():
     convertor = ExchangeConvertor(conf=conf)
-    convertor.tink_rates.rate = 1
-    convertor.thb_rates.rate = 1
     convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
     rate, message = convertor.get_exchange_message_rub_thb()
     assert rate != 1.02
-    assert convertor.tink_rates.rate != 1
-    assert convertor.thb_rates.rate != 1
+    assert convertor.tink_rates.rate != 0
+    assert convertor.thb_rates.rate != 0
     assert datetime.datetime.now() - convertor.thb_rates._time < datetime.timedelta(minutes=1)
     assert datetime.datetime.now() - convertor.tink_rates._time < datetime.timedelta(minutes=1)
+
+
+def test_get_rub_thb_rate_by_amount():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tink_rates.rate = 30
+    convertor.thb_rates.rate = 30
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    convertor.bkkbbank.last_rates = (30, '')
+    convertor.bkkbbank.tier_rates = {'USD1': (15, ''), 'USD5': (20, ''), 'USD50': (30, '')}
+    assert convertor.get_rub_thb_rate_by_amount(30, 'RUB') == (2.0, 2.04)
+    assert convertor.get_rub_thb_rate_by_amount(300, 'RUB') == (1.49, 1.52)
+    assert convertor.get_rub_thb_rate_by_amount(3000, 'THB') == (1.0, 1.02)
+
+
+def slow_fetch(calls):
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return 30, 'message'
+
+    return fetch
+
+
+def test_value_data_single_flight():
+    value_data = ValueData()
+    calls = []
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda _: value_data.refresh(slow_fetch(calls)).rate, range(32)))
+    assert results == [30] * 32
+    assert len(calls) == 1
+    assert value_data.is_expired is False
+
+
+def test_value_data_single_flight_async():
+    value_data = ValueData()
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*[value_data.refresh_async(slow_fetch(calls)) for _ in range(16)])
+
+    results = asyncio.run(run())
+    assert [result.rate for result in results] == [30] * 16
+    assert len(calls) == 1
+
+
+def test_value_data_failed_refresh_retried():
+    value_data = ValueData(retry_delay=0)
+    value_data.refresh(lambda: (_ for _ in ()).throw(RuntimeError))
+    assert isinstance(value_data.last_error, RuntimeError)
+    assert value_data.is_expired is True
+    assert value_data.refresh(lambda: (30, 'message')).rate == 30
+    assert value_data.last_error is None
+
+
+def test_value_data_unpacking_none():
+    value_data = ValueData(retry_delay=60)
+    assert value_data.refresh(lambda: None).rate == 0
+    assert value_data.is_retry_pending is True
+    fetch = MagicMock(return_value=(30, 'message'))
+    value_data.refresh(fetch)
+    fetch.assert_not_called()
+
+
+def test_value_data_stale_while_revalidate():
+    value_data = ValueData(rate=30, message='message\n', retry_delay=0)
+    value_data._time = datetime.datetime.now() - datetime.timedelta(hours=2)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(2)
+        return 31, 'new message\n'
+
+    # устаревший курс отдается сразу с отметкой возраста, обновление идет в фоне
+    assert value_data.refresh(fetch).rate == 30
+    assert value_data.text == '(!) 120 min old\nmessage\n'
+    assert value_data.revalidate_in_background(fetch) is False
+    release.set()
+    with value_data._lock:
+        pass
+    assert value_data.rate == 31
+    assert value_data.text == 'new message\n'
+
+
+def test_value_data_keeps_last_good_rate():
+    value_data = ValueData(rate=30, message='message\n', retry_delay=60)
+    value_data._time = datetime.datetime.now() - datetime.timedelta(hours=2)
+    with pytest.raises(ValueError):
+        value_data.update(lambda: (None, None))
+    assert value_data.rate == 30
+    assert value_data.is_stale is True
+    assert value_data.revalidate_in_background(lambda: (31, '')) is False
+
+
+def test_conversion_snapshot(tmp_path):
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tink_rates.rate, convertor.thb_rates.rate = 30, 30
+    convertor.tink_rates._time = convertor.thb_rates._time = datetime.datetime.now()
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    convertor.bkkbbank.tier_rates = {'USD1': (15, ''), 'USD5': (20, ''), 'USD50': (30, '')}
+    snapshot = convertor.conversion_snapshot()
+    amounts = [30, 300, 3000, 3000]
+    currencies = ['RUB', 'RUB', 'RUB', 'THB']
+    expected = []
+    for amount, currency in zip(amounts, currencies):
+        _, rate = convertor.get_rub_thb_rate_by_amount(amount, currency)
+        expected.append(round(amount * rate, 2) if currency == 'THB' else round(amount / rate, 2))
+    assert snapshot.convert(amounts, currencies).tolist() == expected
+
+    source, result = tmp_path / 'ledger.csv', tmp_path / 'ledger_thb.csv'
+    source.write_text('id,amount,currency\n' + ''.join(f'{i},{a},{c}\n' for i, (a, c) in
+                                                          enumerate(zip(amounts, currencies))))
+    assert convert_csv(str(source), str(result), snapshot, currency_column='currency', chunksize=3) == (4, [])
+    lines = result.read_text().splitlines()
+    assert lines[0] == 'id,amount,currency,converted'
+    assert [float(line.split(',')[-1]) for line in lines[1:]] == expected
+
+
+def test_conversion_snapshot_unknown_currency(tmp_path):
+    snapshot = ConversionSnapshot(30, 30, np.asarray([1, 5, 50], dtype=np.float64), np.asarray([1, 1, 1.02]))
+    assert snapshot.convert([30, 30], [' rub', 'Thb ']).tolist() == [30, 30]
+    with pytest.raises(ValueError):
+        snapshot.convert([30, 30], ['RUB', 'EUR'])
+    with pytest.raises(ValueError):
+        snapshot.rates_for([30], 'USD')
+
+    source, result = tmp_path / 'ledger.csv', tmp_path / 'ledger_thb.csv'
+    source.write_text('id,amount,currency\n0,30,RUB\n1,30,EUR\n2,30, thb\n3,30,\n')
+    assert convert_csv(str(source), str(result), snapshot, currency_column='currency', chunksize=2) == (4, [1, 3])
+    converted = [line.split(',')[-1] for line in result.read_text().splitlines()[1:]]
+    assert converted == ['30.0', '', '30.0', '']
+
+
+def test_conversion_snapshot_unavailable():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tinkoff.get_usd_last_rate = MagicMock(return_value=None)
+    convertor.bkkbbank.get_usd_to_thb_rates = MagicMock(return_value=None)
+    with pytest.raises(ValueError):
+        convertor.conversion_snapshot()
+
+
+def test_rendered_messages_cached_per_rates_version():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tink_rates.rate, convertor.tink_rates.message = 30, 'USD\n'
+    convertor.thb_rates.rate, convertor.thb_rates.message = 30, 'THB\n'
+    convertor.tink_rates._time = convertor.thb_rates._time = datetime.datetime.now()
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    build = MagicMock(side_effect=convertor._build_exchange_message_rub_thb)
+    convertor._build_exchange_message_rub_thb = build
+    assert convertor.get_info_message() == 'USD\nTHB\nRUB / THB   : 1.0\nRUB / THB*  : 1.02\n'
+    assert convertor.get_exchange_message_rub_thb() == (1.02, 'RUB / THB   : 1.0\nRUB / THB*  : 1.02\n')
+    assert build.call_count == 1
+    convertor.thb_rates.rate = 60
+    assert convertor.get_exchange_message_rub_thb()[0] == 0.51
+    assert build.call_count == 2
+    assert convertor.get_info_message().endswith('RUB / THB*  : 0.51\n')
+
+
+def test_rendered_message_cache_hit_updates_money():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tink_rates.rate, convertor.thb_rates.rate = 30, 30
+    convertor.tink_rates._time = convertor.thb_rates._time = datetime.datetime.now()
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    convertor.get_exchange_message_rub_thb()
+    convertor.money = money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    convertor._rendered['exchange_message_rub_thb'] = (convertor.rates_version, (1.02, 'cached'))
+    assert convertor.get_exchange_message_rub_thb() == (1.02, 'cached')
+    assert (money.usd_rub, money.usd_thb) == (30, 30)
+
+
+def test_rendered_message_built_once_in_streaming_mode():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    # в режиме потока курс USD / RUB запрашивается из памяти при каждой команде
+    convertor.tinkoff.streamer = MagicMock()
+    convertor.tinkoff.get_usd_last_rate = MagicMock(return_value=(30, 'USD\n'))
+    convertor.bkkbbank.get_usd_to_thb_rates = MagicMock(return_value=(30, 'THB\n'))
+    build = MagicMock(side_effect=convertor._build_exchange_message_rub_thb)
+    convertor._build_exchange_message_rub_thb = build
+    messages = {convertor.get_info_message() for _ in range(5)}
+    assert messages == {'USD\nTHB\nRUB / THB   : 1.0\nRUB / THB*  : 1.02\n'}
+    assert convertor.tinkoff.get_usd_last_rate.call_count == 5
+    assert build.call_count == 1
+
+
+def test_value_data_version_counts_concurrent_updates():
+    value_data = ValueData()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda rate: setattr(value_data, 'rate', rate), range(1, 1001)))
+    assert value_data.version == 1002
+    value_data.rate, value_data.message = value_data.rate, ''
+    assert value_data.version == 1002
+
+
+def test_quotes_recorded_on_refresh():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    convertor.tinkoff.get_usd_last_rate = MagicMock(return_value=(30, 'USD\n'))
+    convertor.bkkbbank.get_usd_to_thb_rates = MagicMock(return_value=(60, 'THB\n'))
+    convertor.get_exchange_message_rub_thb()
+    history = convertor.quote_history
+    assert sorted(history.pairs) == ['RUB_THB', 'RUB_THB_ZDV', 'USD_RUB', 'USD_THB']
+    assert history.last('USD_RUB')[1] == 30
+    assert history.last('RUB_THB_ZDV')[1] == 0.51
+    message = convertor.get_history_message('RUB_THB', 3)
+    assert message == f"RUB_THB\n{datetime.date.today().strftime('%d/%m/%Y')}  0.5\n"
+    assert convertor.get_history_message('USD_THB', 1).startswith('USD_THB\n')
+    assert history.last('RUB_THB')[0] == history.last('RUB_THB_ZDV')[0] == history.last('USD_RUB')[0]
+
+
+def test_quotes_recorded_once_per_interval():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.tink_rates.rate, convertor.thb_rates.rate = 30, 60
+    minute = datetime.datetime.now().replace(second=0, microsecond=0)
+    for second in range(5):
+        convertor.tink_rates._time = minute + datetime.timedelta(seconds=second)
+        convertor.record_quotes(convertor.tink_rates)
+    assert [len(convertor.quote_history.range(pair, minute)) for pair in QUOTE_PAIRS] == [1, 0, 1, 1]
+
+
+def test_cross_quote_recorded_after_both_providers_refresh():
+    convertor = ExchangeConvertor(conf=conf)
+    convertor.money = ValueRate(raif_ex=0, swift=0, thb_ex=0)
+    minute = datetime.datetime.now().replace(second=0, microsecond=0)
+    convertor.tink_rates.rate, convertor.tink_rates._time = 80, minute - datetime.timedelta(hours=1)
+    # USD / THB обновляется раньше, курс RUB / THB считается по курсу USD / RUB прошлого часа
+    convertor.thb_rates.rate, convertor.thb_rates._time = 36, minute + datetime.timedelta(seconds=10)
+    convertor.record_quotes(convertor.thb_rates)
+    assert convertor.quote_history.last(RUB_THB)[1] == 2.22
+    # через 2 секунды обновляется USD / RUB, курс RUB / THB того же интервала заменяется
+    convertor.tink_rates.rate, convertor.tink_rates._time = 90, minute + datetime.timedelta(seconds=12)
+    convertor.record_quotes(convertor.tink_rates)
+    assert [rate for _, rate in convertor.quote_history.range(RUB_THB, minute)] == [2.5]
+    assert [rate for _, rate in convertor.quote_history.range(RUB_THB_ZDV, minute)] == [2.55]
+
+
+def test_chart_series_from_quote_history():
+    convertor = ExchangeConvertor(conf=conf)
+    assert convertor.get_chart(RUB_THB, 3) is None
+    now = datetime.datetime.now()
+    convertor.quote_history.append_many([(RUB_THB, now - datetime.timedelta(days=5), 2.5),
+                                         (RUB_THB, now - datetime.timedelta(hours=1), 2.4),
+                                         (RUB_THB, now, 2.45)])
+    series = convertor.get_chart_series(RUB_THB, 3)
+    assert series.values == [2.4, 2.45]
+    assert series.ema is None
+    assert series.times[-1] == now.astimezone(datetime.timezone.utc)
+    assert len(convertor.get_chart_series(RUB_THB, 7).values) == 3
+
+
+def test_chart_series_from_candles(tink_candles_history):
+    convertor = ExchangeConvertor(conf=conf)
+    # свечи сдвигаются к текущему времени, первая свеча выходит за период графика
+    shift = datetime.datetime.now(datetime.timezone.utc) - tink_candles_history[-1].time
+    candles = [dataclasses.replace(candle, time=candle.time + shift) for candle in tink_candles_history]
+    candles[0] = dataclasses.replace(candles[0], time=candles[0].time - datetime.timedelta(days=2))
+    convertor.tinkoff.client.candle_store.merge(FIGI_USD, candles)
+    series = convertor.get_chart_series(USD_RUB, 1)
+    assert series.values == [35682.0, 35693.0, 35839.0]
+    assert series.ema == [None] * 3
+    assert series.times[0] == candles[1].time
+    assert len(convertor.get_chart_series(USD_RUB, 3).values) == 4
@@ -0,0 +1,93 @@
+import pytest
+
+from src.convertor.cross_rate import CrossRateEngine, RateEdge
+from src.convertor.convertor import ValueRate
+
+
+@pytest.fixture
+def engine():
+    engine = CrossRateEngine(trusted_providers=('TINKOFF', 'BANGKOKBANK'))
+    engine.set_rate('RUB', 'USD', 1 / 80, fees=(2,), provider='TINKOFF')
+    engine.set_rate('USD', 'THB', 35, fees=(3, 0.2), provider='BANGKOKBANK')
+    engine.set_rate('RUB', 'EUR', 1 / 90, fees=(1,), provider='TINKOFF')
+    engine.set_rate('EUR', 'THB', 38, provider='BANGKOKBANK')
+    return engine
+
+
+def test_edge_multiplier():
+    assert RateEdge('USD', 'THB', 35, (10, 10)).multiplier == pytest.approx(35 * 0.81)
+
+
+def test_best_cross_rate(engine):
+    via_usd = 1 / 80 * 0.98 * 35 * 0.97 * 0.998
+    via_eur = 1 / 90 * 0.99 * 38
+    assert engine.rate('RUB', 'THB') == pytest.approx(max(via_usd, via_eur))
+    assert [edge.target for edge in engine.route('RUB', 'THB')] == ['EUR', 'THB']
+    assert engine.rate('RUB', 'RUB') == 1
+    assert engine.rate('THB', 'RUB') == 0
+    assert engine.route('THB', 'RUB') is None
+    assert engine.rate('RUB', 'JPY') == 0
+
+
+def test_rate_change_recomputes_matrix(engine):
+    engine.rate('RUB', 'THB')
+    engine.set_rate('EUR', 'THB', 0, provider='BANGKOKBANK')
+    assert [edge.provider for edge in engine.route('RUB', 'THB')] == ['TINKOFF', 'BANGKOKBANK']
+    assert [edge.target for edge in engine.route('RUB', 'THB')] == ['USD', 'THB']
+
+
+def test_best_provider_for_pair(engine):
+    engine.set_rate('USD', 'THB', 36, provider='OTHER')
+    assert engine.route('USD', 'THB')[0].provider == 'OTHER'
+    assert engine.rate('USD', 'THB') == pytest.approx(36)
+
+
+def test_matrix(engine):
+    currencies, matrix = engine.matrix()
+    assert matrix.shape == (len(currencies), len(currencies))
+    i, j = currencies.index('RUB'), currencies.index('THB')
+    assert matrix[i, j] == pytest.approx(engine.rate('RUB', 'THB'))
+
+
+def test_arbitrage_cycle_excluded(engine):
+    rub_thb = engine.rate('RUB', 'THB')
+    # обратный курс THB -> RUB выгоднее прямого: цикл RUB -> EUR -> THB -> RUB дает прибыль
+    engine.set_rate('THB', 'RUB', 3, provider='ARBITRAGE')
+    assert engine.arbitrage == [RateEdge('THB', 'RUB', 3.0, (), 'ARBITRAGE')]
+    assert engine.rate('RUB', 'RUB') == 1
+    assert engine.rate('THB', 'RUB') == 0
+    assert engine.rate('USD', 'THB') == pytest.approx(35 * 0.97 * 0.998)
+    assert engine.rate('RUB', 'THB') == pytest.approx(rub_thb)
+    engine.set_rate('THB', 'RUB', 2, provider='ARBITRAGE')
+    assert engine.arbitrage == []
+    assert engine.rate('THB', 'RUB') == 2
+
+
+def test_arbitrage_quote_before_refresh_excluded():
+    engine = CrossRateEngine(trusted_providers=('TINKOFF', 'BANGKOKBANK'))
+    # курс с арбитражем получен раньше, поставщики обновляют свои курсы после него
+    engine.set_rate('THB', 'RUB', 3, provider='ARBITRAGE')
+    engine.set_rate('RUB', 'USD', 1 / 80, fees=(2,), provider='TINKOFF')
+    engine.set_rate('USD', 'THB', 35, fees=(3, 0.2), provider='BANGKOKBANK')
+    assert [edge.provider for edge in engine.arbitrage] == ['ARBITRAGE']
+    assert engine.rate('RUB', 'THB') == pytest.approx(1 / 80 * 0.98 * 35 * 0.97 * 0.998)
+
+
+def test_arbitrage_stalest_quote_excluded():
+    engine = CrossRateEngine()
+    engine.set_rate('THB', 'RUB', 3, provider='OTHER')
+    engine.set_rate('RUB', 'USD', 1 / 80, provider='OTHER')
+    engine.set_rate('USD', 'THB', 35, provider='OTHER')
+    engine.set_rate('RUB', 'USD', 1 / 81, provider='OTHER')
+    assert engine.arbitrage == [RateEdge('THB', 'RUB', 3.0, (), 'OTHER')]
+    assert engine.rate('RUB', 'THB') == pytest.approx(35 / 81)
+    assert engine.route('RUB', 'THB') == [RateEdge('RUB', 'USD', 1 / 81, (), 'OTHER'),
+                                          RateEdge('USD', 'THB', 35.0, (), 'OTHER')]
+
+
+def test_value_rate_uses_engine():
+    money = ValueRate(usd_thb=35, usd_rub=80)
+    assert money.rub_thb == 2.44
+    assert money.engine.route('RUB', 'THB')[0].provider == 'TINKOFF'
+    money.usd_rub = 70
+    assert money.rub_thb == 2.13
@@ -0,0 +1,69 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from src.config.configurator import ExchangeConvertorConfiguration
+from src.convertor.convertor import ExchangeConvertor
+from src.convertor.refresh_scheduler import RefreshScheduler, RefreshJob
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_job_schedule_with_jitter():
+    job = RefreshJob('TEST', MagicMock(), interval=100, jitter=10, retry_delay=5)
+    job.schedule()
+    assert 90 <= job.next_run - time.monotonic() <= 100
+    job.schedule(succeeded=False)
+    assert 4 <= job.next_run - time.monotonic() <= 5
+
+
+def test_run_pending_per_provider_interval():
+    scheduler = RefreshScheduler()
+    fast, slow = MagicMock(), MagicMock()
+    scheduler.add_job(RefreshJob('FAST', fast, interval=0))
+    scheduler.add_job(RefreshJob('SLOW', slow, interval=100))
+    scheduler.run_pending()
+    scheduler.run_pending()
+    assert fast.call_count == 2
+    assert slow.call_count == 1
+
+
+def test_failed_job_retried():
+    scheduler = RefreshScheduler()
+    refresh = MagicMock(side_effect=[RuntimeError('upstream'), None])
+    scheduler.add_job(RefreshJob('FAILING', refresh, interval=100, retry_delay=0))
+    scheduler.run_pending()
+    scheduler.run_pending()
+    assert refresh.call_count == 2
+    assert scheduler.jobs['FAILING'].next_run - time.monotonic() > 50
+
+
+def test_scheduler_thread():
+    scheduler = RefreshScheduler()
+    called = threading.Event()
+    scheduler.add_job(RefreshJob('TEST', called.set, interval=100))
+    scheduler.start()
+    assert called.wait(2)
+    assert scheduler.is_running
+    scheduler.stop(timeout=2)
+    assert scheduler.is_running is False
+
+
+def test_convertor_refresh_ahead():
+    convertor = ExchangeConvertor(conf=ExchangeConvertorConfiguration())
+    convertor.tinkoff.get_usd_last_rate = MagicMock(return_value=(80, 'USD'))
+    convertor.bkkbbank.get_usd_to_thb_rates = MagicMock(return_value=(35, 'THB'))
+    convertor.start_refresh_ahead()
+    try:
+        assert wait_for(lambda: convertor.tink_rates.rate == 80 and convertor.thb_rates.rate == 35)
+    finally:
+        convertor.stop_refresh_ahead()
+    convertor.get_usd_rub_data()
+    convertor.get_usd_thb_data()
+    convertor.tinkoff.get_usd_last_rate.assert_called_once()
+    convertor.bkkbbank.get_usd_to_thb_rates.assert_called_once()
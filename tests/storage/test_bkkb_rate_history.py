@@ -0,0 +1,40 @@
+import datetime
+
+import pytest
+
+from src.storage.bkkb_rate_history import BKKBRateHistory
+
+
+@pytest.fixture
+def lak_rows():
+    return [
+        {"Family": "LAK", "TT": "1.70", "Ddate": "04/03/2023", "DTime": "09:00"},
+        {"Family": "LAK", "TT": "1.75", "Ddate": "05/03/2023", "DTime": "10:00"},
+    ]
+
+
+def test_history_merge_deduplicates(lak_rows):
+    history = BKKBRateHistory()
+    history.merge('LAK', lak_rows)
+    rows = history.merge('LAK', lak_rows[1:] + [{"Family": "LAK", "TT": "1.80", "Ddate": "05/03/2023",
+                                                  "DTime": "12:00"}])
+    assert [row['TT'] for row in rows] == ['1.70', '1.75', '1.80']
+    assert history.last_date('LAK') == datetime.date(2023, 3, 5)
+    assert history.last_date('USD50') is None
+
+
+def test_history_persisted(tmp_path, lak_rows):
+    BKKBRateHistory(str(tmp_path)).merge('LAK', lak_rows)
+    history = BKKBRateHistory(str(tmp_path))
+    assert history.rows('LAK') == lak_rows
+    assert history.range('LAK', datetime.date(2023, 3, 5), datetime.date(2023, 3, 6)) == lak_rows[1:]
+
+
+def test_history_merge_same_date_update_replaces(tmp_path):
+    history = BKKBRateHistory(str(tmp_path))
+    first = [{"Family": "LAK", "TT": "1.75", "Ddate": "05/03/2023", "DTime": ""}]
+    second = [{"Family": "LAK", "TT": "1.82", "Ddate": "05/03/2023", "DTime": ""}]
+    history.merge('LAK', first)
+    rows = history.merge('LAK', second)
+    assert [row['TT'] for row in rows] == ['1.82']
+    assert [row['TT'] for row in BKKBRateHistory(str(tmp_path)).rows('LAK')] == ['1.82']
@@ -0,0 +1,33 @@
+import datetime
+
+from src.storage.bkkb_rate_sheet import BKKBRateSheet, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate('81.75        ') == 81.75
+    assert parse_rate('-         ') is None
+    assert parse_rate(None) is None
+
+
+def test_rate_sheet_all_columns(get_lak_update_rates, get_usd_update_rates):
+    sheet = BKKBRateSheet.from_rows(get_lak_update_rates + get_usd_update_rates)
+    assert sorted(sheet.families) == ['LAK', 'USD50']
+    usd = sheet.get('USD50')
+    assert usd.date == datetime.date(2023, 3, 4)
+    assert usd.get('BuyingRates') == 81.52
+    assert usd.get('SellingRates') == 82.83
+    assert usd.get('SightBill') is None
+    assert sheet.rate('LAK') == 1.75
+    assert sheet.rate('EUR') is None
+
+
+def test_rate_sheet_keeps_last_row():
+    rows = [
+        {"Family": "LAK", "TT": "1.80", "Ddate": "05/03/2023", "DTime": "12:00"},
+        {"Family": "LAK", "TT": "1.70", "Ddate": "04/03/2023", "DTime": "09:00"},
+    ]
+    sheet = BKKBRateSheet.from_rows(rows)
+    assert sheet.rate('LAK') == 1.80
+    sheet.update([{"Family": "LAK", "TT": "1.85", "Ddate": "06/03/2023", "DTime": "09:00"}])
+    assert sheet.rate('LAK') == 1.85
+    assert len(sheet) == 1
@@ -0,0 +1,34 @@
+import datetime
+
+import pytest
+
+from src.storage.candle_array import CandleArray
+from src.utils.calculation_utils import cast_money
+
+
+@pytest.fixture
+def candle_array(tink_candles_history):
+    return CandleArray.from_candles(tink_candles_history)
+
+
+def test_candle_array_prices(candle_array, tink_candles_history):
+    assert len(candle_array) == 4
+    assert candle_array.closes.tolist() == [cast_money(candle.close) for candle in tink_candles_history]
+    assert candle_array.data['high'][1] == 35753.0
+
+
+def test_candle_array_time(candle_array, tink_candles_history):
+    assert candle_array.time_at(-1) == tink_candles_history[-1].time
+    assert candle_array.time_at(0).tzinfo == datetime.timezone.utc
+
+
+def test_candle_array_max_price(candle_array):
+    assert candle_array.max_price_at(-1) == 35839.0
+    assert candle_array.max_price_at(0) == 35548.0
+
+
+def test_candle_array_to_frame(candle_array, tink_candles_history):
+    frame = candle_array.to_frame()
+    assert frame.columns.tolist() == ['time', 'volume', 'open', 'close', 'high', 'low']
+    assert frame['time'].iloc[-1] == tink_candles_history[-1].time
+    assert frame['volume'].tolist() == [1, 18, 1, 8]
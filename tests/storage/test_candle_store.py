@@ -0,0 +1,62 @@
+import datetime
+from copy import copy
+
+import pytest
+
+from src.storage.candle_array import CandleArray
+from src.storage.candle_store import CandleStore
+
+
+@pytest.fixture
+def candle_store():
+    return CandleStore(history=datetime.timedelta(days=3))
+
+
+def test_empty_store(candle_store):
+    assert candle_store.last_time('FIGI') is None
+    assert candle_store.get('FIGI') is None
+
+
+def test_merge_candles(candle_store, tink_candles_history):
+    candles = candle_store.merge('FIGI', tink_candles_history)
+    assert len(candles) == 4
+    assert candle_store.last_time('FIGI') == tink_candles_history[-1].time
+    assert candle_store.get('FIGI') is candles
+
+
+def test_merge_appends_only_new_candles(candle_store, tink_candles_history, monkeypatch):
+    candle_store.merge('FIGI', tink_candles_history[:3])
+    stored = candle_store.get('FIGI')
+    converted = []
+    from_candles = CandleArray.from_candles
+    monkeypatch.setattr(CandleArray, 'from_candles', lambda candles: converted.append(len(candles)) or from_candles(candles))
+    candles = candle_store.merge('FIGI', tink_candles_history[3:])
+    assert converted == [1]
+    assert candles.closes.tolist() == [35548.0, 35682.0, 35693.0, 35839.0]
+    # ранее выданный массив не изменяется при слиянии
+    assert len(stored) == 3
+    assert candle_store.merge('FIGI', []) is candles
+
+
+def test_merge_replaces_open_candle(candle_store, tink_candles_history):
+    candle_store.merge('FIGI', tink_candles_history)
+    updated_candle = copy(tink_candles_history[-1])
+    updated_candle.volume = 100
+    candles = candle_store.merge('FIGI', [updated_candle])
+    assert len(candles) == 4
+    assert candles.data['volume'].tolist() == [1, 18, 1, 100]
+
+
+def test_merge_drops_old_candles(candle_store, tink_candles_history):
+    candle_store.merge('FIGI', tink_candles_history[:1])
+    new_candle = copy(tink_candles_history[-1])
+    new_candle.time = tink_candles_history[0].time + datetime.timedelta(days=4)
+    candles = candle_store.merge('FIGI', [new_candle])
+    assert len(candles) == 1
+    assert candles.time_at(0) == new_candle.time
+
+
+def test_clear_store(candle_store, tink_candles_history):
+    candle_store.merge('FIGI', tink_candles_history)
+    candle_store.clear('FIGI')
+    assert candle_store.get('FIGI') is None
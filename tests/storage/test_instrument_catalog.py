@@ -0,0 +1,55 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.controllers.tink_controller import TinkoffDataFrameFormat
+from src.storage.instrument_catalog import InstrumentCatalog
+
+
+@pytest.fixture
+def instruments():
+    return [
+        {'ticker': 'CRM2', 'figi': 'FUTCNY062200', 'type': 'futures', 'name': 'CNY-6.22 Курс Юань - Рубль'},
+        {'ticker': 'USD000UTSTOM', 'figi': 'BBG0013HGFT4', 'type': 'currencies', 'name': 'Доллар США'},
+    ]
+
+
+@pytest.fixture
+def catalog_client(instruments):
+    client = MagicMock()
+    client.get_all_figi_list = MagicMock(return_value=instruments)
+    return client
+
+
+def test_catalog_refresh_and_load(tmp_path, catalog_client, instruments):
+    path = str(tmp_path / 'catalog.json.gz')
+    catalog = InstrumentCatalog(catalog_client, path, ttl=datetime.timedelta(hours=1))
+    assert catalog.get() == instruments
+    catalog_client.get_all_figi_list.assert_called_once()
+
+    cached_catalog = InstrumentCatalog(MagicMock(), path, ttl=datetime.timedelta(hours=1))
+    assert cached_catalog.get() == instruments
+    assert cached_catalog.is_expired is False
+    cached_catalog.client.get_all_figi_list.assert_not_called()
+
+
+def test_catalog_missing_file(tmp_path, catalog_client):
+    catalog = InstrumentCatalog(catalog_client, str(tmp_path / 'missing.json.gz'), ttl=datetime.timedelta(hours=1))
+    assert catalog.load() is False
+    assert catalog.is_expired is True
+
+
+def test_expired_catalog_refreshed_in_background(tmp_path, catalog_client, instruments):
+    path = str(tmp_path / 'catalog.json.gz')
+    InstrumentCatalog(catalog_client, path, ttl=datetime.timedelta(hours=1)).refresh()
+    catalog = InstrumentCatalog(catalog_client, path, ttl=datetime.timedelta(seconds=0))
+    catalog.refresh_in_background = MagicMock()
+    assert catalog.get() == instruments
+    catalog.refresh_in_background.assert_called_once()
+
+
+def test_dataframe_from_catalog(tmp_path, catalog_client):
+    catalog = InstrumentCatalog(catalog_client, str(tmp_path / 'catalog.json.gz'), ttl=datetime.timedelta(hours=1))
+    tink_df = TinkoffDataFrameFormat.from_catalog(catalog)
+    assert tink_df.get_figi_by_ticker('USD000UTSTOM') == 'BBG0013HGFT4'
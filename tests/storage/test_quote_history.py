@@ -0,0 +1,62 @@
+import datetime
+
+from src.storage.quote_history import QuoteHistory
+
+
+def test_quote_history_range():
+    history = QuoteHistory()
+    start = datetime.datetime(2023, 4, 1, 10, 0, tzinfo=datetime.timezone.utc)
+    history.append_many([('RUB_THB', start + datetime.timedelta(hours=hour), round(2.4 + hour / 100, 2)) for hour in range(48)])
+    history.append('USD_RUB', start, 80.5)
+    rows = history.range('RUB_THB', start + datetime.timedelta(hours=24), start + datetime.timedelta(hours=26))
+    assert [rate for _, rate in rows] == [2.64, 2.65, 2.66]
+    assert rows[0][0] == start + datetime.timedelta(hours=24)
+    assert len(history.range('RUB_THB', start)) == 48
+    assert history.last('RUB_THB') == (start + datetime.timedelta(hours=47), 2.87)
+    assert history.last('USD_THB') is None
+    assert history.pairs == ['RUB_THB', 'USD_RUB']
+
+
+def test_quote_history_min_interval():
+    history = QuoteHistory(min_interval=60)
+    start = datetime.datetime(2023, 4, 1, 10, 0, tzinfo=datetime.timezone.utc)
+    history.append_many([('USD_RUB', start + datetime.timedelta(seconds=second), 80 + second / 100)
+                         for second in range(0, 150, 10)])
+    history.append('USD_THB', start, 35.0)
+    # в каждой минуте остается последняя котировка
+    assert [rate for _, rate in history.range('USD_RUB', start)] == [80.5, 81.1, 81.4]
+    history.append('USD_RUB', start + datetime.timedelta(seconds=170), 82.0)
+    history.append('USD_RUB', start + datetime.timedelta(seconds=130), 81.0)
+    history.append('USD_RUB', start + datetime.timedelta(seconds=180), 82.5)
+    assert history.range('USD_RUB', start + datetime.timedelta(seconds=120)) == [
+        (start + datetime.timedelta(seconds=170), 82.0), (start + datetime.timedelta(seconds=180), 82.5)]
+    history.append('USD_RUB', start + datetime.timedelta(seconds=190), 82.5)
+    assert history.last('USD_RUB') == (start + datetime.timedelta(seconds=180), 82.5)
+    assert len(history.range('USD_THB', start)) == 1
+
+
+def test_quote_history_retention():
+    history = QuoteHistory(retention_days=7)
+    now = datetime.datetime.now()
+    history.append_many([('RUB_THB', now - datetime.timedelta(days=10), 2.4),
+                         ('RUB_THB', now - datetime.timedelta(days=1), 2.5)])
+    history.append('RUB_THB', now, 2.6)
+    assert [rate for _, rate in history.range('RUB_THB', now - datetime.timedelta(days=30))] == [2.5, 2.6]
+
+
+def test_quote_history_times_in_utc():
+    history = QuoteHistory()
+    local = datetime.datetime(2023, 4, 1, 10, 0)
+    history.append('USD_RUB', local, 80.5)
+    assert history.last('USD_RUB') == (local.astimezone(datetime.timezone.utc), 80.5)
+    assert history.last('USD_RUB')[0].tzinfo == datetime.timezone.utc
+
+
+def test_quote_history_append_only(tmp_path):
+    path = str(tmp_path / 'quotes.sqlite3')
+    time = datetime.datetime(2023, 4, 1, 10, 0, tzinfo=datetime.timezone.utc)
+    history = QuoteHistory(path)
+    history.append('USD_RUB', time, 80.5)
+    history.append('USD_RUB', time, 81.0)
+    history.close()
+    assert QuoteHistory(path).range('USD_RUB', time) == [(time, 80.5)]
@@ -0,0 +1,90 @@
+import multiprocessing
+import time
+
+import pytest
+
+from src.convertor.convertor import ValueData
+from src.storage.rate_cache import MemoryRateCache, SQLiteRateCache, RateSnapshot, make_rate_cache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def rate_cache(request, tmp_path):
+    return make_rate_cache(request.param, str(tmp_path / 'rates.sqlite3'))
+
+
+def test_rate_cache_snapshot(rate_cache):
+    assert rate_cache.get('USD_RUB') is None
+    rate_cache.set('USD_RUB', RateSnapshot(80.5, 'USD   : 80.5\n', 1000.0))
+    assert rate_cache.get('USD_RUB') == RateSnapshot(80.5, 'USD   : 80.5\n', 1000.0)
+
+
+def test_rate_cache_lock(rate_cache):
+    assert rate_cache.acquire('USD_RUB', 'first', ttl=60) is True
+    assert rate_cache.acquire('USD_RUB', 'second', ttl=60) is False
+    assert rate_cache.acquire('USD_THB', 'second', ttl=60) is True
+    rate_cache.release('USD_RUB', 'second')
+    assert rate_cache.acquire('USD_RUB', 'second', ttl=60) is False
+    rate_cache.release('USD_RUB', 'first')
+    with rate_cache.lock('USD_RUB') as acquired:
+        assert acquired is True
+        assert rate_cache.acquire('USD_RUB', 'second', ttl=60) is False
+
+
+def test_rate_cache_lock_expires(rate_cache):
+    assert rate_cache.acquire('USD_RUB', 'first', ttl=0) is True
+    with rate_cache.lock('USD_RUB', timeout=1) as acquired:
+        assert acquired is True
+    with rate_cache.lock('USD_RUB', ttl=60):
+        with rate_cache.lock('USD_RUB', timeout=0.1) as acquired:
+            assert acquired is False
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        make_rate_cache('redis')
+
+
+def test_value_data_reads_shared_snapshot():
+    cache = MemoryRateCache()
+    first = ValueData(key='USD_RUB', cache=cache)
+    second = ValueData(key='USD_RUB', cache=cache)
+    first.refresh(lambda: (80, 'USD'))
+    assert second.refresh(lambda: pytest.fail('second worker must not call upstream')).rate == 80
+    assert second.message == 'USD'
+
+
+def test_value_data_busy_lock_keeps_cached_rate():
+    cache = MemoryRateCache()
+    cache.set('USD_RUB', RateSnapshot(80, 'USD', time.time() - 7200))
+    assert cache.acquire('USD_RUB', 'other worker', ttl=60) is True
+    value_data = ValueData(key='USD_RUB', cache=cache, lock_ttl=0.1)
+    value_data.update(lambda: pytest.fail('upstream must not be called without the lock'))
+    assert value_data.rate == 80
+    assert value_data.is_stale is True
+
+
+def fetch_in_worker(counter_path):
+    with open(counter_path, 'a') as file:
+        file.write('1\n')
+    time.sleep(0.3)
+    return 80, 'USD'
+
+
+def refresh_in_worker(cache_path, counter_path, results):
+    value_data = ValueData(key='USD_RUB', cache=SQLiteRateCache(cache_path))
+    results.put(value_data.refresh(lambda: fetch_in_worker(counter_path)).rate)
+
+
+def test_value_data_single_refresh_across_processes(tmp_path):
+    cache_path, counter_path = str(tmp_path / 'rates.sqlite3'), str(tmp_path / 'counter')
+    SQLiteRateCache(cache_path)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=refresh_in_worker, args=(cache_path, counter_path, results))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert sorted(results.get(timeout=1) for _ in workers) == [80] * 4
+    with open(counter_path) as file:
+        assert len(file.readlines()) == 1
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.clients.bkkb_async_client import AsyncBKKBClient
+from src.clients.bkkb_client import BKKBClient
+from src.config.configurator import BKKBConfiguration
+from src.controllers.bkkb_async_controller import AsyncBKKBDataFrameFormat
+from src.utils.bad_auth_exception import BadAuthException
+
+
+@pytest.fixture
+def stub_server(get_last_data_response, get_family_response, get_usd_update_rates):
+    routes = {
+        'GetDateTimeLastUpdate': get_last_data_response,
+        'Getfxfamily': get_family_response,
+        'GetChartfxrates': get_usd_update_rates,
+    }
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.headers.get('Ocp-Apim-Subscription-Key') != 'TOKEN':
+                self.send_response(401, 'Access denied')
+                body = json.dumps({'message': None}).encode()
+            else:
+                self.send_response(200)
+                body = json.dumps(routes[self.path.split('/')[1]]).encode()
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.requested = requested
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_conf(server, token='TOKEN'):
+    return BKKBConfiguration(token=token, url=f'http://127.0.0.1:{server.server_port}', history_path='')
+
+
+def test_async_client_requests(stub_server, get_family_response):
+    async def run():
+        client = AsyncBKKBClient(make_conf(stub_server))
+        try:
+            families = await client.get_all_values_families()
+            chart = await client.get_last_all_rate_update_for_value(dict(day='01', month='03', year='2023'), 'USD50')
+        finally:
+            await client.close()
+        return families, chart
+
+    families, chart = asyncio.run(run())
+    assert families.status_code == 200
+    assert families.json() == get_family_response
+    assert chart.json()[0].get('Family') == 'USD50'
+    assert stub_server.requested[-1].startswith('/GetChartfxrates/01/03/2023/')
+    assert stub_server.requested[-1].endswith('/USD50/en')
+
+
+def test_async_controller_rates(stub_server):
+    async def run():
+        controller = AsyncBKKBDataFrameFormat(make_conf(stub_server))
+        try:
+            update = await controller.format_update_data()
+            rates = await controller.format_get_x_rate(update, 'USD50')
+            families = await controller.format_all_values_family()
+            await controller.format_all_values_family()
+        finally:
+            await controller.close()
+        return update, rates, families
+
+    update, rates, families = asyncio.run(run())
+    assert update == dict(day='24', month='04', year='2023', last_time_update='09:10     ')
+    assert rates[0] == 81.75
+    assert 'Update:  03/04/2023' in rates[1]
+    assert len(families) > 10
+    assert len([path for path in stub_server.requested if path == '/Getfxfamily']) == 1
+
+
+def test_async_controller_family_lookup(stub_server):
+    async def run():
+        controller = AsyncBKKBDataFrameFormat(make_conf(stub_server))
+        try:
+            family = await controller.format_get_family_by_currency('US Dollar 50-100')
+            close = await controller.format_get_close_families_by_reg_name('dollar')
+        finally:
+            await controller.close()
+        return controller, family, close
+
+    controller, family, close = asyncio.run(run())
+    assert not isinstance(controller.client, BKKBClient)
+    assert family == 'USD50'
+    assert 'USD50' in close['Family'].tolist()
+    assert len([path for path in stub_server.requested if path == '/Getfxfamily']) == 1
+
+
+def test_async_controller_bad_auth(stub_server):
+    async def run():
+        controller = AsyncBKKBDataFrameFormat(make_conf(stub_server, token='INCORRECT_TOKEN'))
+        try:
+            await controller.format_update_data()
+        finally:
+            await controller.close()
+
+    with pytest.raises(BadAuthException):
+        asyncio.run(run())
@@ -1,6 +1,7 @@
 import pytest
 import datetime
 
+import requests
 from pandas import DataFrame
 
 
@@ -96,3 +97,20 @@ def test_last_rate_update_incorrect_value(correct_client, requests_mock):
     response = bkkb_client.get_last_all_rate_update_for_value(dict(day=fdd, month=fmm, year=fyyyy), family)
     assert response.status_code == 200
     assert len(response.json()) == 0
+
+
+def test_session_timeout_and_reuse(requests_mock, correct_client):
+    bkkb_client = correct_client
+    requests_mock.get('http://some_url/ServiceVersion', text='2.0.0.1', status_code=200)
+    session = bkkb_client.session
+    bkkb_client.get_data('ServiceVersion')
+    bkkb_client.get_data('ServiceVersion')
+    assert bkkb_client.session is session
+    assert requests_mock.call_count == 2
+    assert requests_mock.request_history[0].timeout == (3.05, 10)
+
+
+def test_session_timeout_error(requests_mock, correct_client):
+    requests_mock.get('http://some_url/ServiceVersion', exc=requests.exceptions.ConnectTimeout)
+    with pytest.raises(requests.exceptions.Timeout):
+        correct_client.get_data('ServiceVersion')
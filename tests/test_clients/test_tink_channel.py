@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+import pytest
+from grpc import StatusCode
+from tinkoff.invest import RequestError
+
+from src.clients.tink_channel import TinkoffChannel
+from src.utils.bad_auth_exception import BadAuthException
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr('src.clients.tink_channel.invest.Client', MagicMock(return_value=client))
+    return client
+
+
+def test_channel_opened_once(fake_client):
+    channel = TinkoffChannel('TOKEN')
+    services = channel.services
+    assert channel.services is services
+    assert channel.is_open is True
+    fake_client.__enter__.assert_called_once()
+    services.users.get_accounts.assert_called_once()
+
+
+def test_channel_reset_verifies_again(fake_client):
+    channel = TinkoffChannel('TOKEN')
+    services = channel.services
+    channel.reset()
+    assert channel.is_open is False
+    fake_client.__exit__.assert_called_once()
+    channel.services
+    assert services.users.get_accounts.call_count == 2
+
+
+def test_channel_bad_auth(fake_client):
+    error = RequestError(StatusCode.UNAUTHENTICATED, 'details', MagicMock(message='BAD TOKEN'))
+    fake_client.__enter__.return_value.users.get_accounts = MagicMock(side_effect=error)
+    channel = TinkoffChannel('INCORRECT_TOKEN')
+    with pytest.raises(BadAuthException):
+        channel.services
+    assert channel.is_open is False
+    fake_client.__exit__.assert_called_once()
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.clients.tink_client import TinkoffBankClient
+from src.config.configurator import TinkBankConfiguration
+from src.utils.bad_auth_exception import BadAuthException
+
+
+@pytest.fixture
+def tink_client():
+    client = TinkoffBankClient(TinkBankConfiguration(token='TOKEN'))
+    client.channel = MagicMock()
+    return client
+
+
+def test_get_candles_incremental(tink_client, tink_candles_history):
+    get_candles = tink_client.channel.services.market_data.get_candles
+    get_candles.return_value = MagicMock(candles=tink_candles_history)
+    assert len(tink_client.get_candles_by_figi('FIGI')) == 4
+
+    get_candles.return_value = MagicMock(candles=tink_candles_history[-1:])
+    assert len(tink_client.get_candles_by_figi('FIGI')) == 4
+    assert get_candles.call_args.kwargs['from_'] == tink_candles_history[-1].time
+
+
+def test_get_candles_incorrect_figi(tink_client):
+    tink_client.channel.services.market_data.get_candles.return_value = MagicMock(candles=[])
+    assert tink_client.get_candles_by_figi('INCORRECT_FIGI') is None
+
+
+def test_get_candles_by_figi_list(tink_client, tink_candles_history):
+    tink_client.get_candles_by_figi = MagicMock(side_effect=lambda figi: tink_candles_history if figi == 'FIGI' else None)
+    candles = tink_client.get_candles_by_figi_list(['FIGI', 'INCORRECT_FIGI'])
+    assert candles == {'FIGI': tink_candles_history, 'INCORRECT_FIGI': None}
+
+
+def test_get_candles_by_figi_list_one_failed(tink_client, tink_candles_history):
+    def get_candles(figi):
+        if figi == 'FAILED_FIGI':
+            raise BadAuthException('access denied')
+        return tink_candles_history
+
+    tink_client.get_candles_by_figi = MagicMock(side_effect=get_candles)
+    candles = tink_client.get_candles_by_figi_list(['FIGI', 'FAILED_FIGI', 'OTHER_FIGI'])
+    assert candles == {'FIGI': tink_candles_history, 'FAILED_FIGI': None, 'OTHER_FIGI': tink_candles_history}
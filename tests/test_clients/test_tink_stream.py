@@ -0,0 +1,61 @@
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from tinkoff.invest import MarketDataResponse, Candle, LastPrice, Quotation
+
+from src.clients.tink_stream import FakeStreamSource, MarketDataStreamer, TinkoffStreamSource
+from src.storage.candle_store import CandleStore
+
+
+@pytest.fixture
+def stream_candle():
+    return Candle(figi='FIGI', open=Quotation(units=80, nano=0), high=Quotation(units=82, nano=0),
+                  low=Quotation(units=79, nano=0), close=Quotation(units=81, nano=0), volume=10,
+                  time=datetime.datetime(2023, 4, 3, 10, 0, tzinfo=datetime.timezone.utc))
+
+
+@pytest.fixture
+def stream_last_price():
+    return LastPrice(figi='FIGI', price=Quotation(units=81, nano=500000000),
+                     time=datetime.datetime(2023, 4, 3, 10, 15, tzinfo=datetime.timezone.utc))
+
+
+def test_streamer_handle(stream_candle, stream_last_price):
+    store = CandleStore(history=datetime.timedelta(days=3))
+    streamer = MarketDataStreamer(FakeStreamSource([]), store, ['FIGI'])
+    streamer.handle(MarketDataResponse(candle=stream_candle))
+    streamer.handle(MarketDataResponse(last_price=stream_last_price))
+    assert store.get('FIGI').time_at(-1) == stream_candle.time
+    assert len(store.get('FIGI')) == 1
+    assert streamer.get_last_price('FIGI') == 81.5
+    assert streamer.get_last_price('UNKNOWN_FIGI') is None
+
+
+def test_streamer_resubscribe_on_drop(stream_candle, stream_last_price):
+    store = CandleStore(history=datetime.timedelta(days=3))
+    source = FakeStreamSource([
+        [MarketDataResponse(candle=stream_candle)],
+        ConnectionError('STREAM DROPPED'),
+        [MarketDataResponse(last_price=stream_last_price)],
+    ])
+    streamer = MarketDataStreamer(source, store, ['FIGI'], reconnect_delay=0)
+    streamer.start()
+    assert source.exhausted.wait(timeout=5)
+    streamer.stop(timeout=5)
+    assert streamer.is_running is False
+    assert source.connections == 4
+    assert store.get('FIGI').time_at(-1) == stream_candle.time
+    assert len(store.get('FIGI')) == 1
+    assert streamer.get_last_price('FIGI') == 81.5
+
+
+def test_tinkoff_source_stops_previous_stream_on_reconnect():
+    channel = MagicMock()
+    first, second = MagicMock(), MagicMock()
+    channel.services.create_market_data_stream.side_effect = [first, second]
+    source = TinkoffStreamSource(channel)
+    source.stream(['FIGI'])
+    assert source.stream(['FIGI']) is second
+    first.stop.assert_called_once()
+    second.stop.assert_not_called()
@@ -1,10 +1,12 @@
 import datetime
 
+import pandas as pd
 import pytest
+from ta.trend import ema_indicator
 
 from src.utils.calculation_utils import buy_rub_knowing_rub, \
     buy_rub_knowing_thb, cast_money, \
-    is_time_to_update
+    is_time_to_update, IncrementalEma, cast_money_bulk, buy_rub_knowing_rub_bulk, buy_rub_knowing_thb_bulk
 
 
 def test_buy_rub_knowing_rub():
@@ -34,3 +36,37 @@ def test_is_time_to_update():
     time = datetime.datetime(2019, 12, 4)
     assert is_time_to_update(time=time) == True
     assert is_time_to_update(datetime.datetime.now()) == False
+
+
+def test_incremental_ema_matches_ta():
+    closes = pd.Series([81.2, 81.5, 80.9, 82.1, 82.4, 81.7, 81.9, 82.8, 83.1, 82.6, 82.9, 83.4])
+    ema_expected = ema_indicator(close=closes, window=9)
+    ema = IncrementalEma(window=9)
+    ema.seed(range(len(closes) - 1), closes[:-1])
+    assert ema.value == pytest.approx(ema_expected.iloc[-2])
+    # незакрытая свеча изменилась, затем пришла новая свеча
+    ema.update(len(closes) - 2, 0)
+    ema.update(len(closes) - 2, closes.iloc[-2])
+    ema.update(len(closes) - 1, closes.iloc[-1])
+    assert ema.value == pytest.approx(ema_expected.iloc[-1])
+
+
+def test_incremental_ema_before_window():
+    ema = IncrementalEma(window=9)
+    ema.seed(range(3), [1.0, 2.0, 3.0])
+    assert ema.value is None
+    assert ema.update(1, 10.0) is None
+    assert ema.count == 3
+
+
+def test_cast_money_bulk():
+    result = cast_money_bulk([[250, 0], [1, 3]], [[850000000, 150], [0, 500000000]])
+    assert result.shape == (2, 2)
+    assert result.tolist() == [[250.85, 0.00000015], [1.0, 3.5]]
+
+
+def test_buy_bulk_matches_scalar():
+    values = [0, 1, 99, 1000, 12345]
+    assert buy_rub_knowing_rub_bulk(values, 2.45).tolist() == [buy_rub_knowing_rub(v, 2.45) for v in values]
+    assert buy_rub_knowing_thb_bulk(values, 2.45).tolist() == [buy_rub_knowing_thb(v, 2.45) for v in values]
+    assert buy_rub_knowing_rub_bulk([100, 100], [2, 4]).tolist() == [50.0, 25.0]
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+from src.bin.startup_profile import profile_imports
+from src.utils.lazy_import import lazy_module
+
+
+def test_lazy_module_loaded_on_attribute():
+    lazy_json = lazy_module('json')
+    assert lazy_json.is_loaded is False
+    assert lazy_json.dumps([1]) == '[1]'
+    assert lazy_json.is_loaded is True
+
+
+def test_convertor_import_is_lazy():
+    heavy_modules = ['pandas', 'ta', 'pytz', 'tinkoff', 'grpc', 'flask']
+    code = f'import sys, src.convertor.convertor; print([m for m in {heavy_modules} if m in sys.modules])'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
+
+
+def test_profile_imports():
+    records = profile_imports('src.utils.lazy_import')
+    names = [name for name, _, _ in records]
+    assert names[-1] == 'src.utils.lazy_import'
+    assert all(cumulative >= self_time for _, self_time, cumulative in records)
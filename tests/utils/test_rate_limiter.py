@@ -0,0 +1,19 @@
+import time
+
+from src.utils.rate_limiter import RateLimiter
+
+
+def test_rate_limiter_within_quota():
+    limiter = RateLimiter(max_calls=3, period=60)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+def test_rate_limiter_waits_for_window():
+    limiter = RateLimiter(max_calls=2, period=0.2)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.2
@@ -0,0 +1,19 @@
+from src.utils.search_index import TrigramIndex, make_trigrams
+
+
+def test_make_trigrams():
+    assert make_trigrams('Usd') == {'  u', ' us', 'usd', 'sd '}
+
+
+def test_trigram_search_ranking():
+    index = TrigramIndex(['US Dollar 1-2', 'US Dollar 50-100', 'Euro', 'Hong Kong Dollar'])
+    results = index.search('dollar')
+    assert [position for position, _ in results] == [0, 1, 3]
+    assert index.search('INCORRECT') == []
+
+
+def test_trigram_contains():
+    index = TrigramIndex(['US Dollar 1-2', 'Euro', 'Hong Kong Dollar'])
+    assert index.contains('DOLLAR') == [0, 2]
+    assert index.contains('eu') == [1]
+    assert index.contains('yen') == []